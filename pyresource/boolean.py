@@ -1,15 +1,16 @@
 from tt import BooleanExpression
-from .exceptions import ExpressionValidationError
-from .utils import coerce_query_values, coerce_query_value
+from .exceptions import ExpressionValidationError, QueryValidationError
+from .utils import coerce_query_values
 
 
 NOT = 'not'
 AND = 'and'
 OR = 'or'
-UNARY_OPERATORS = {NOT}
-BINARY_OPERATORS = {AND, OR}
+# operator sets are frozen: they are only used for membership checks
+UNARY_OPERATORS = frozenset({NOT})
+BINARY_OPERATORS = frozenset({AND, OR})
 BOOLEAN_OPERATORS = UNARY_OPERATORS | BINARY_OPERATORS
-SIMPLE_EXPRESSIONS = {AND, OR}
+SIMPLE_EXPRESSIONS = frozenset({AND, OR})
 
 
 def build_expression(expression, mapping):
@@ -73,86 +74,114 @@ def _build_expression(expression, mapping):
         return mapping[symbol]
 
 
+def _where_key(level, parts):
+    """Get the original querystring key of a where, for errors"""
+    with_level = f'.{level}' if level else ''
+    remainder = ':' + ':'.join(parts) if parts else ''
+    return f'where{with_level}{remainder}'
+
+
+def _where_expression(parts, value, i, level):
+    # where=a and b
+    if len(value) > 1:
+        raise QueryValidationError(
+            f'Invalid where key "{_where_key(level, parts)}", multiple values provided'
+        )
+    return value[0], None, None
+
+
+def _where_equals(parts, value, i, level):
+    # where:name=Joe
+    # -> {"=": ["name", "Joe"]}
+    return None, {
+        '=': [parts[0], coerce_query_values(value, singletons=False)]
+    }, str(i)
+
+
+def _where_operator(parts, value, i, level):
+    # where:name:equals=Joe
+    # -> {"equals": ["name", "Joe"]}
+    return None, {
+        parts[1]: [parts[0], coerce_query_values(value, singletons=False)]
+    }, str(i)
+
+
+def _where_tagged(parts, value, i, level):
+    # where:name:equals:tag=Joe
+    # -> {"equals": ["name", "Joe"]} tagged as "tag"
+    key = parts[2]
+    if key in BOOLEAN_OPERATORS:
+        raise QueryValidationError(
+            f'Invalid where key "{_where_key(level, parts)}", using operator "{key}"'
+        )
+    return None, {
+        parts[1]: [parts[0], coerce_query_values(value, singletons=False)]
+    }, key
+
+
+# where handlers by number of key parts:
+# each returns (expression, operand, key)
+WHERE_HANDLERS = (
+    _where_expression,
+    _where_equals,
+    _where_operator,
+    _where_tagged,
+)
+
+
 class WhereQueryMixin:
+    __slots__ = ()
 
     @classmethod
-    def update_where(cls, query, leveled):
+    def build_where(cls, leveled):
+        """Build where expressions from parsed querystring conditions
+
+        Arguments:
+            leveled: dict of level to list of (parts, value),
+                where parts are the key parts after "where"
+                and value is the list of querystring values
+        Returns:
+            list of (level, where expression)
+        """
+        num_handlers = len(WHERE_HANDLERS)
+        result = []
         for level, wheres in leveled.items():
             expression = 'and'
             operands = {}
-            for i, where in enumerate(wheres):
-                num_parts = len(where)
-                with_level = f'.{level}' if level else ''
-                separator = ':'
-                with_remainder = separator + separator.join(where[:-1]) if num_parts > 1 else ''
-                original = f"where{with_level}{with_remainder}"
-                key = operand = None
-                if num_parts == 1:
-                    # where=a and b
-                    value = where[0]
-                    if len(value) > 1:
-                        value = ', '.join(value)
-                        raise QueryValidationError(
-                            f'Invalid where key "{original}", multiple values provided'
-                        )
-                    value = value[0]
-                    expression = value
-                elif num_parts == 2:
-                    # where:name=Joe
-                    # -> {"name": "Joe"}
-                    operand = {
-                        '=': [where[0], coerce_query_values(where[1], singletons=False)]
-                    }
-                    key = str(i)
-                elif num_parts == 3:
-                    # where:name:equals=Joe
-                    # -> {"equals": ["name", "Joe"]}}
-                    operand = {
-                        where[1]: [where[0], coerce_query_values(where[2], singletons=False)]
-                    }
-                    key = str(i)
-                elif num_parts == 4:
-                    # where:name:equals:tag=Joe
-                    operand = {
-                        where[1]: [
-                            where[0], coerce_query_values(where[3], singletons=False)
-                        ]
-                    }
-                    key = where[2]
-                    if key in BOOLEAN_OPERATORS:
-                        raise QueryValidationError(
-                            f'Invalid where key "{original}", using operator "{key}"'
-                        )
-                else:
+            for i, (parts, value) in enumerate(wheres):
+                num_parts = len(parts)
+                if num_parts >= num_handlers:
                     raise QueryValidationError(
-                        f'Invalid where key "{original}", too many segments'
+                        f'Invalid where key "{_where_key(level, parts)}", too many segments'
                     )
-                if operand and key:
+                value, operand, key = WHERE_HANDLERS[num_parts](parts, value, i, level)
+                if value is not None:
+                    expression = value
+                elif operand and key:
                     if key in operands:
                         raise QueryValidationError(
                             f'Invalid where keys, duplicate tags for "{key}"'
                         )
                     operands[key] = operand
 
-            values = list(operands.values())
             if expression not in SIMPLE_EXPRESSIONS:
                 # expression specified, try to build it
                 update = build_expression(expression, operands)
+            elif len(operands) == 1:
+                # simplest case: just one condition
+                update = next(iter(operands.values()))
             else:
-                # no expression given, implicit AND
-                if len(values) == 1:
-                    # simplest case: just one condition
-                    update = values
-                else:
-                    # many conditions
-                    update = {expression: values}
-
-            if len(update) == 1:
-                update = update[0]
-
-            update = {'where': update}
+                # no expression given, implicit AND of many conditions
+                update = {expression: list(operands.values())}
+            result.append((level, update))
+        return result
+
+    @classmethod
+    def update_where(cls, query, leveled):
+        for level, update in cls.build_where(leveled):
+            # where is set in place, without merging
             query._update(
-                update,
+                {'where': update},
                 level=level,
                 merge=False,
                 copy=False
@@ -1,12 +1,14 @@
 try:
-    from django.db.models import Prefetch, F, Value, OuterRef, Subquery
+    from django.db.models import Prefetch, F, Q, Value, OuterRef, Subquery
 except ImportError:
     raise Exception('django must be installed')
 
-import copy
+import json
+from django.core.exceptions import FieldDoesNotExist
 from pyresource.executor import Executor
 from pyresource.translator import ResourceTranslator
 from pyresource.resolver import RequestResolver
+from pyresource.query import clone_state
 from pyresource.exceptions import (
     Forbidden,
     FilterError,
@@ -21,7 +23,7 @@ from pyresource.exceptions import (
 from pyresource.utils.types import get_link
 from django.contrib.postgres.aggregates import ArrayAgg
 from pyresource.utils import resource_to_django, make_literal
-from .operators import make_expression, make_filter
+from .operators import get_expression, get_filter
 # use a single resolver across all executors
 from .resolver import resolver
 from .prefetch import FastQuery, FastPrefetch
@@ -72,9 +74,10 @@ class DjangoQueryLogic:
         if not where:
             return None
 
-        where = RequestResolver.resolve(where, query=query, request=request)
+        # resolve placeholders only, constant parts are compiled once
+        where = RequestResolver.compile_cached(where)(query=query, request=request)
         try:
-            return make_filter(where, translate=resource if translate else None)
+            return get_filter(where, translate=resource if translate else None)
         except FilterError as e:
             raise ResourceMisconfigured(
                 f"{resource.id}: failed to build filters\n" f"Error: {e}"
@@ -255,7 +258,20 @@ class DjangoQueryLogic:
         after = page.get("after", None)
         offset = 0
         if level is not None:
-            pass # return queryset  # TODO
+            related = context.get("related", None)
+            if related is not None and not related.is_list:
+                # at most one related record per parent, nothing to paginate
+                return queryset
+        else:
+            # sorted pages need a total order: break ties by primary key
+            # unsorted pages are left as-is and use offset pagination
+            keyset = cls._get_keyset(queryset)
+            if keyset and "pk" not in keyset and "-pk" not in keyset:
+                queryset = queryset.order_by(*keyset, "pk")
+
+        if count is not None:
+            # total of all pages
+            count["total"] = queryset.count()
 
         if after:
             try:
@@ -263,29 +279,122 @@ class DjangoQueryLogic:
             except Exception as e:
                 raise QueryValidationError(f"page:after is invalid: {after} ({str(e)})")
 
-            if "offset" in after:
+            if "after" in after:
+                # keyset-pagination
+                # after = {'after': {'created': '2020-01-01', 'pk': 1}, 'offset': 100}
+                # one value per ordered column, "-" marks descending order
+                # the offset is the position of the page, kept for offset fallbacks
+                after = after["after"]
+                keyset = cls._get_keyset(queryset)
+                if (
+                    level is not None
+                    or list(after.keys()) != keyset
+                    or not cls._is_keyset_safe(queryset, keyset)
+                ):
+                    raise QueryValidationError(
+                        "page:after is invalid: does not match the sort order"
+                    )
+                queryset = queryset.filter(cls._get_keyset_filter(after))
+            elif "offset" in after:
                 # offset-pagination
                 # after = {'offset': 100}
                 offset = after["offset"]
-                queryset = queryset[offset : offset + size + 1]
-            elif "after" in after:
-                # keyset-pagination
-                # after = {'after': {'id': 1, 'name': 'test', ...}}
-                # only ordered fields are included
-                filters = {f"{key}__gt": value for key, value in after["after"].items()}
-                queryset = queryset.filter(**filters)
+                return queryset[offset : offset + size + 1]
             else:
-                raise QueryValidationError("page:after is invalid: {after}")
+                raise QueryValidationError(f"page:after is invalid: {after}")
 
-
-        if count is not None:
-            count["total"] = queryset.count()
         queryset = queryset[: size + 1]
         return queryset
 
+    @classmethod
+    def _get_keyset(cls, queryset):
+        """Get the ordered columns of a queryset, for keyset pagination
+
+        Returns:
+            list of columns, "-" marks descending order,
+            or None if the ordering is not made of columns only
+        """
+        keyset = []
+        for order in queryset.query.order_by:
+            if not isinstance(order, str) or order == "?":
+                return None
+            keyset.append(order)
+        return keyset
+
+    @classmethod
+    def _is_keyset_safe(cls, queryset, keyset):
+        """Whether keyset pagination can be used for the given columns
+
+        Comparisons skip null values, so every column must be non-null:
+        a concrete field of the model, or of non-null foreign keys
+        """
+        for key in keyset:
+            column = key[1:] if key.startswith("-") else key
+            if column == "pk":
+                continue
+            opts = queryset.model._meta
+            parts = column.split("__")
+            last = len(parts) - 1
+            for i, part in enumerate(parts):
+                try:
+                    field = opts.get_field(part)
+                except FieldDoesNotExist:
+                    # annotation or transform
+                    return False
+                if field.null or not field.concrete or field.many_to_many:
+                    return False
+                if i < last:
+                    if not field.is_relation:
+                        return False
+                    opts = field.related_model._meta
+        return True
+
+    @classmethod
+    def _get_keyset_filter(cls, after):
+        """Get a filter for the records that come after a keyset cursor
+
+        For columns (a, -b, pk) and values (x, y, z), the filter is:
+            a > x or (a = x and b < y) or (a = x and b = y and pk > z)
+        """
+        result = equal = None
+        for key, value in after.items():
+            if key.startswith("-"):
+                column = key[1:]
+                comparison = Q(**{f"{column}__lt": value})
+            else:
+                column = key
+                comparison = Q(**{f"{column}__gt": value})
+            if equal is not None:
+                comparison = equal & comparison
+            result = comparison if result is None else result | comparison
+            equality = Q(**{column: value})
+            equal = equality if equal is None else equal & equality
+        return result
+
+    @classmethod
+    def _get_keyset_cursor(cls, queryset, record):
+        """Get the keyset cursor values for the records after a given record
+
+        Returns:
+            dict of column (as in _get_keyset) to JSON value,
+            or None if the record does not have a value for each column
+        """
+        keyset = cls._get_keyset(queryset)
+        if not keyset or not cls._is_keyset_safe(queryset, keyset):
+            return None
+
+        after = {}
+        for key in keyset:
+            value = record.get(key[1:] if key.startswith("-") else key)
+            if value is None:
+                # missing, or null (nulls cannot be compared)
+                return None
+            after[key] = cls._to_json_value(value)
+        return after
+
     @classmethod
     def _make_aggregation(cls, aggregation):
-        return make_expression(aggregation)
+        return get_expression(aggregation)
 
     @classmethod
     def _make_annotation(cls, field, **context):
@@ -312,7 +421,7 @@ class DjangoQueryLogic:
                 return F(source)
         else:
             # functional annotation e.g. {"count": "location.users"}
-            return make_expression(field.source)
+            return get_expression(field.source)
 
     @classmethod
     def _add_queryset_fields(
@@ -356,6 +465,12 @@ class DjangoQueryLogic:
 
         only = list(annotations.keys())
         only.append('pk')
+        if level is None:
+            # add the ordered columns for keyset pagination cursors
+            for key in cls._get_keyset(queryset) or ():
+                column = key[1:] if key.startswith("-") else key
+                if column not in only:
+                    only.append(column)
         return queryset.only(*only)
 
     @classmethod
@@ -427,7 +542,7 @@ class DjangoQueryLogic:
             # add context from related field
             related_source = related.source
             if isinstance(related_source, dict) and "queryset" in related_source:
-                source = copy.deepcopy(resource.source) if isinstance(resource.source, dict) else {
+                source = clone_state(resource.source) if isinstance(resource.source, dict) else {
                     'queryset': {
                         'model': resource.source
                     }
@@ -514,9 +629,9 @@ class DjangoExecutor(Executor, DjangoQueryLogic):
             else:
                 if resource.singleton:
                     # get queryset and obtain first record
-                    record = self._get_queryset(
+                    record = self._get_singleton_record(
                         resource, fields, query, request=request, can=can, **context
-                    ).first()
+                    )
                     if not record:
                         raise ResourceMisconfigured(
                             f"{resource.id}: could not locate record for singleton resource"
@@ -552,7 +667,12 @@ class DjangoExecutor(Executor, DjangoQueryLogic):
                         records = list(queryset)
                         num_records = len(records)
                         if num_records and num_records > page_size:
-                            link = self._get_next_page(query)
+                            link = self._get_next_page(
+                                query,
+                                after=self._get_keyset_cursor(
+                                    queryset, records[page_size - 1]
+                                )
+                            )
                             page_data = {"after": link}
                             if count:
                                 page_data["total"] = count["total"]
@@ -584,6 +704,35 @@ class DjangoExecutor(Executor, DjangoQueryLogic):
             queries['queries'] = capture.queries
         return result
 
+    def _get_singleton_record(
+        self, resource, fields, query, request=None, can=None, **context
+    ):
+        """Get the record backing a singleton resource
+
+        The record is cached on the request, so that a singleton that is
+        read many times during the same request is only fetched once
+        """
+        key = None
+        cache = self._get_request_cache(request, 'singletons')
+        if cache is not None:
+            key = (resource.id, json.dumps(query.state, sort_keys=True, default=str))
+            if key in cache:
+                return cache[key]
+
+        record = self._get_queryset(
+            resource, fields, query, request=request, can=can, **context
+        ).first()
+        if record and cache is not None:
+            cache[key] = record
+        return record
+
+    @classmethod
+    def _clear_singleton_cache(cls, request):
+        """Drop cached singleton records after a write"""
+        cache = cls._get_request_cache(request, 'singletons')
+        if cache:
+            cache.clear()
+
     def get_record(self, query, request=None, **context):
         return self._get_resource("record", query, request=request, **context)
 
@@ -705,6 +854,9 @@ class DjangoExecutor(Executor, DjangoQueryLogic):
                     instances.append(instance)
 
 
+            # records are about to change, do not serve stale singletons
+            self._clear_singleton_cache(request)
+
             ids = []
             # actually save the instances and their new IDs
             for i, instance in enumerate(instances):
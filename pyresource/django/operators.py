@@ -1,4 +1,8 @@
 import decimal
+import json
+import threading
+from collections import namedtuple
+from operator import and_, or_, invert
 from django.db.models import Q, F, Value, Count, Min, Max, Avg
 from django.db.models.functions import (
     Now,
@@ -41,25 +45,99 @@ from pyresource.utils import is_literal, resource_to_django
 from pyresource.translator import ResourceTranslator
 
 
+# operator kinds
+COMPOUND = 'compound'
+COMPARISON = 'comparison'
+EXPRESSION = 'expression'
+
+
+class Operator(namedtuple('Operator', ('kind', 'method', 'num_args'), defaults=(None,))):
+    """A filter or expression operator
+
+    A tuple, so that lookups can unpack all fields at once
+
+    Attributes:
+        kind: COMPOUND, COMPARISON, or EXPRESSION
+        method: callable that builds the result
+        num_args: expected number of arguments, None for any
+    """
+    __slots__ = ()
+
+
+# placeholder for names that are not operators
+UNKNOWN_OPERATOR = Operator(None, None)
+
+
 # core set of operators
 compound_operators = {
-    'or': lambda a, b: a | b,
-    'and': lambda a, b: a & b,
-    'not': lambda a: ~a
+    'or': Operator(COMPOUND, or_),
+    'and': Operator(COMPOUND, and_),
+    'not': Operator(COMPOUND, invert, num_args=1)
 }
 
 
+def fold(method, values):
+    """Combine values pairwise with a binary method
+
+    Produces a balanced tree, e.g. for [a, b, c, d]: (a | b) | (c | d)
+    """
+    if not values:
+        raise ValueError('cannot fold an empty list')
+    while len(values) > 1:
+        values = [
+            method(values[i], values[i + 1]) if i + 1 < len(values) else values[i]
+            for i in range(0, len(values), 2)
+        ]
+    return values[0]
+
+
+# cache of transformed query keys
+# key: (query key, id of translating resource)
+# value: (translating resource, transformed key)
+QUERY_KEY_CACHE_SIZE = 4096
+_query_keys = {}
+_query_keys_lock = threading.Lock()
+
+
 def transform_query_key(key, translate=None):
+    cacheable = isinstance(key, str)
+    if cacheable:
+        cache_key = (key, id(translate))
+        cached = _query_keys.get(cache_key)
+        if cached is not None and cached[0] is translate:
+            return cached[1]
+
     if is_literal(key):
         raise ValueError('key cannot be a literal')
 
+    result = key
     if translate:
-        key = ResourceTranslator.translate(key, translate)
-
-    return resource_to_django(key)
+        result = ResourceTranslator.translate(result, translate)
+
+    result = resource_to_django(result)
+    if cacheable:
+        with _query_keys_lock:
+            if len(_query_keys) >= QUERY_KEY_CACHE_SIZE:
+                # evict the oldest entry
+                _query_keys.pop(next(iter(_query_keys)), None)
+            _query_keys[cache_key] = (translate, result)
+    return result
+
+
+def transform_query_value(value, *, _F=F):
+    # dispatch on the exact type first: strings and numbers are
+    # the most common arguments and skip the generic checks below
+    value_type = type(value)
+    if value_type is str:
+        if is_literal(value):
+            # strip out 'literal' quoting
+            return value[1:-1]
+        # field references should be converted to Django F() references
+        return _F(value)
 
+    if value_type is int or value_type is float or value is None:
+        return value
 
-def transform_query_value(value):
     if isinstance(value, dict):
         try:
             return make_expression(value)
@@ -70,10 +148,8 @@ def transform_query_value(value):
         return [transform_query_value(v) for v in value]
 
     if not is_literal(value):
-        # field references should be converted to Django F() references
-        value = F(value)
+        value = _F(value)
     elif isinstance(value, str) and value:
-        # strip out 'literal' quoting
         value = value[1:-1]
 
     # all other literals pass through
@@ -88,54 +164,89 @@ def make_comparison_operator(
     transform=None,
     value=None
 ):
-    inverse_str = isinstance(inverse, str)
-    def method(a, b=None, translate=None):
-        if value is not None:
-            b = value
-
-        inverted = False
-        filter_name = name
-        try:
-            key = transform_query_key(a, translate=translate)
-            val = transform_query_value(b)
-        except ValueError:
-            try:
-                if not can_invert:
-                    raise FilterError(
-                        'Cannot invert {name} filter and LHS is a literal: {a}'
-                    )
-
-                key = transform_query_key(b)
-                val = transform_query_value(b)
-                inverted = True
-                if inverse_str:
-                    filter_name = inverse
-            except ValueError:
+    # captured values are bound as keyword-only defaults
+    # so that they are read as fast locals when the method is called
+    def method(
+        a,
+        b=None,
+        translate=None,
+        *,
+        _name=name,
+        _suffix=f'__{name}',
+        _value=value,
+        _can_invert=can_invert,
+        _inverse=inverse,
+        _inverse_suffix=f'__{inverse}' if isinstance(inverse, str) else None,
+        _transform=transform,
+        _Q=Q
+    ):
+        if _value is not None:
+            b = _value
+
+        inverted = is_literal(a)
+        if inverted:
+            # the LHS must be a field reference:
+            # swap the arguments if the operator allows it
+            if is_literal(b):
+                raise FilterError(
+                    f'Cannot build a {_name} filter from two literals: {a} and {b}'
+                )
+            if not _can_invert:
                 raise FilterError(
-                    'Cannot build a {name} filter from two literals: {a} and {b}'
-                , transform=None)
+                    f'Cannot invert {_name} filter and LHS is a literal: {a}'
+                )
+            a, b = b, a
+
+        key = transform_query_key(a, translate=translate)
+        val = transform_query_value(b)
+        if inverted and _inverse_suffix:
+            # e.g. "1 < a" is the same as "a > 1"
+            suffix = _inverse_suffix
+        else:
+            suffix = _suffix
 
-        q = Q(**{f'{key}__{name}': val})
-        if transform:
+        # same as Q(**{key: val}) without building and sorting kwargs
+        q = _Q()
+        q.children.append((key + suffix, val))
+        if _transform:
             # apply functional transform to Q object
-            q = transform(q)
+            q = _transform(q)
 
-        if inverted and not inverse_str:
+        if inverted and callable(_inverse):
             # apply functional transform to Q object (inverted)
-            q = inverse(q)
+            q = _inverse(q)
         return q
 
-    return {
-        'method': method,
-        'num_args': num_args
-    }
+    return Operator(COMPARISON, method, num_args)
 
 
-not_ = compound_operators['not']
-gt = make_comparison_operator('gt', inverse='lte')
-gte = make_comparison_operator('gte', inverse='lt')
-lt = make_comparison_operator('lt', inverse='gte')
-lte = make_comparison_operator('lte', inverse='gt')
+def make_unary_fixed_operator(name, value, transform=None):
+    """Make a one-argument comparison operator with a fixed value
+
+    For example, "null" compares its argument to True with "isnull".
+    These cannot be inverted, so there is no literal/inversion handling
+    """
+    def method(a, translate=None, *, _suffix=f'__{name}', _value=value, _transform=transform, _Q=Q):
+        if is_literal(a):
+            raise FilterError(f'Cannot build a {name} filter from a literal: {a}')
+
+        key = transform_query_key(a, translate=translate)
+
+        q = _Q()
+        q.children.append((key + _suffix, _value))
+        if _transform:
+            # apply functional transform to Q object
+            q = _transform(q)
+        return q
+
+    return Operator(COMPARISON, method, 1)
+
+
+not_ = compound_operators['not'].method
+gt = make_comparison_operator('gt', inverse='lt')
+gte = make_comparison_operator('gte', inverse='lte')
+lt = make_comparison_operator('lt', inverse='gt')
+lte = make_comparison_operator('lte', inverse='gte')
 eq = make_comparison_operator('exact')
 ne = make_comparison_operator('exact', transform=not_)
 contains = make_comparison_operator('contains', can_invert=False)
@@ -146,10 +257,10 @@ in_ = make_comparison_operator('in', can_invert=False)
 not_in = make_comparison_operator('in', can_invert=False, transform=not_)
 range_ = make_comparison_operator('range', can_invert=False)
 not_range = make_comparison_operator('range', can_invert=False, transform=not_)
-isnull = make_comparison_operator('isnull', num_args=1, value=True, can_invert=False)
-not_null = make_comparison_operator('isnull', num_args=1, value=False, can_invert=False, transform=not_)
-true = make_comparison_operator('exact', num_args=1, value=True, can_invert=False)
-false = make_comparison_operator('exact', num_args=1, value=False, can_invert=False)
+isnull = make_unary_fixed_operator('isnull', True)
+not_null = make_unary_fixed_operator('isnull', False)
+true = make_unary_fixed_operator('exact', True)
+false = make_unary_fixed_operator('exact', False)
 
 
 
@@ -189,14 +300,11 @@ def make_expression_operator(
     num_args=None,
     **extra
 ):
-    def method(*args):
+    def method(*args, _base=base, _extra=extra):
         # optionally add other options like `output_field`
-        return base(*args, **extra)
+        return _base(*args, **_extra)
 
-    return {
-        'method': method,
-        'num_args': num_args
-    }
+    return Operator(EXPRESSION, method, num_args)
 
 concat = make_expression_operator(Concat)
 least = make_expression_operator(Least)
@@ -286,79 +394,98 @@ if MD5:
         'sha512': sha512
     })
 
-def make_literal(value):
-    return f'"{value}"'
+# all operators by name, one lookup resolves the kind
+operators = {
+    **expression_operators,
+    **comparison_operators,
+    **compound_operators
+}
 
 
-def make_expression(value):
+def make_expression(
+    value,
+    *,
+    _operators=operators,
+    _fold=fold,
+    _unknown=UNKNOWN_OPERATOR,
+    _Value=Value,
+    _F=F
+):
+    # module-level names used on every (recursive) call
+    # are bound as keyword-only defaults, as in make_comparison_operator
     if value is None or isinstance(value, (bool, int, float, decimal.Decimal)):
-        return Value(value)
+        return _Value(value)
 
     if isinstance(value, str):
         if is_literal(value):
-            return Value(value[1:-1])
+            return _Value(value[1:-1])
         else:
             value = resource_to_django(value)
-            return F(value)
+            return _F(value)
 
     if not isinstance(value, dict):
         raise ExpressionError(f'value must be a dict or literal, not {value}')
 
-    result = None
-    operators = expression_operators
-    for method, arguments in value.items():
-        if method in compound_operators:
-            if method == 'or' or method == 'and':
-                if not isinstance(arguments, list):
-                    raise ExpressionError('"or"/"and" argument must be a list')
-
-                value = [make_expression(argument) for argument in arguments]
-                return reduce(compound_operators[method], value)
-            elif method == 'not':
-                if isinstance(arguments, list) and len(arguments) == 1:
-                    arguments = arguments[0]
-                if not isinstance(arguments, dict):
-                    raise Expression('"not" argument must be a dict')
-
-                value = make_expression(value)
-                return compound_operators[method](value)
-        elif method in operators:
-            operator = operators[method]
-            num_args = operator.get('num_args', None)
-            fn = operator['method']
-            if num_args is None:
-                pass  # any number of arguments accepted
-            elif num_args == 0:
-                if arguments:
-                    raise ExpressionError(f'"{method}" arguments not expected: {arguments}')
-                arguments = []
-            elif num_args == 1:
-                if isinstance(arguments, list):
-                    if len(arguments) != 1:
-                        raise ExpressionError(
-                            f'"{method}" arguments must be a list of size 1 or non-list value.\n'
-                            f'Instead got: {arguments}'
-                        )
-
-            else:
-                if not isinstance(arguments, list) or not len(arguments) == num_args:
+    if len(value) != 1:
+        raise ExpressionError(f'expression must have exactly one operator, not: {value}')
+
+    method, arguments = next(iter(value.items()))
+    kind, fn, num_args = _operators.get(method, _unknown)
+    if kind == COMPOUND:
+        if method == 'or' or method == 'and':
+            if not isinstance(arguments, list) or not arguments:
+                raise ExpressionError('"or"/"and" argument must be a non-empty list')
+
+            value = [make_expression(argument) for argument in arguments]
+            return _fold(fn, value)
+        elif method == 'not':
+            if isinstance(arguments, list) and len(arguments) == 1:
+                arguments = arguments[0]
+            if not isinstance(arguments, dict):
+                raise ExpressionError('"not" argument must be a dict')
+
+            return fn(make_expression(arguments))
+    elif kind == EXPRESSION:
+        if num_args is None:
+            pass  # any number of arguments accepted
+        elif num_args == 0:
+            if arguments:
+                raise ExpressionError(f'"{method}" arguments not expected: {arguments}')
+            arguments = []
+        elif num_args == 1:
+            if isinstance(arguments, list):
+                if len(arguments) != 1:
                     raise ExpressionError(
-                        f'"{method}" arguments must be a list of size {num_args}.\n'
+                        f'"{method}" arguments must be a list of size 1 or non-list value.\n'
                         f'Instead got: {arguments}'
                     )
 
-            if not isinstance(arguments, list):
-                arguments = [arguments]
-
-            arguments = [make_expression(argument) for argument in arguments]
-            return fn(*arguments)
         else:
-            raise ExpressionError(
-                f'"{method}" is not a valid expression'
-            )
+            if not isinstance(arguments, list) or not len(arguments) == num_args:
+                raise ExpressionError(
+                    f'"{method}" arguments must be a list of size {num_args}.\n'
+                    f'Instead got: {arguments}'
+                )
+
+        if not isinstance(arguments, list):
+            arguments = [arguments]
 
+        arguments = [make_expression(argument) for argument in arguments]
+        return fn(*arguments)
+    else:
+        raise ExpressionError(
+            f'"{method}" is not a valid expression'
+        )
 
-def make_filter(where, translate=None):
+
+def make_filter(
+    where,
+    translate=None,
+    *,
+    _operators=operators,
+    _fold=fold,
+    _unknown=UNKNOWN_OPERATOR
+):
     if isinstance(where, str):
         where = {'true': where}
 
@@ -368,55 +495,97 @@ def make_filter(where, translate=None):
     if isinstance(where, list):
         where = {'or': where}
 
-    result = None
-    for method, arguments in where.items():
-        if method in compound_operators:
-            if method == 'or' or method == 'and':
-                if not isinstance(arguments, list):
-                    raise FilterError('"or"/"and" argument must be a list')
-
-                value = [make_filter(argument, translate=translate) for argument in arguments]
-                return reduce(compound_operators[method], value)
-            elif method == 'not':
-                if isinstance(arguments, list) and len(arguments) == 1:
-                    arguments = arguments[0]
-                if not isinstance(arguments, dict):
-                    raise FilterError('"not" argument must be a dict')
-
-                return compound_operators[method](value)
-        elif method in comparison_operators:
-            operator = comparison_operators[method]
-            num_args = operator.get('num_args', 0)
-            method = operator['method']
-            if num_args == 0:
-                if arguments:
-                    raise FilterError(f'"{method}" arguments not expected: {arguments}')
-                arguments = []
-
-            elif num_args == 1:
-                if isinstance(arguments, list):
-                    if len(arguments) != 1:
-                        raise FilterError(
-                            f'"{method}" arguments must be a list of size 1 or non-list value.\n'
-                            f'Instead got: {arguments}'
-                        )
-
-            elif num_args == 2:
-                if not isinstance(arguments, list) or not len(arguments) == num_args:
+    if len(where) != 1:
+        raise FilterError(f'"where" must have exactly one operator, not: {where}')
+
+    method, arguments = next(iter(where.items()))
+    kind, fn, num_args = _operators.get(method, _unknown)
+    if kind == COMPOUND:
+        if method == 'or' or method == 'and':
+            if not isinstance(arguments, list) or not arguments:
+                raise FilterError('"or"/"and" argument must be a non-empty list')
+
+            value = [make_filter(argument, translate=translate) for argument in arguments]
+            return _fold(fn, value)
+        elif method == 'not':
+            if isinstance(arguments, list) and len(arguments) == 1:
+                arguments = arguments[0]
+            if not isinstance(arguments, dict):
+                raise FilterError('"not" argument must be a dict')
+
+            return fn(make_filter(arguments, translate=translate))
+    elif kind == COMPARISON:
+        if num_args == 0:
+            if arguments:
+                raise FilterError(f'"{method}" arguments not expected: {arguments}')
+            arguments = []
+
+        elif num_args == 1:
+            if isinstance(arguments, list):
+                if len(arguments) != 1:
                     raise FilterError(
-                        f'"{method}" arguments must be a list of size {num_args}.\n'
+                        f'"{method}" arguments must be a list of size 1 or non-list value.\n'
                         f'Instead got: {arguments}'
                     )
 
-            else:
+        elif num_args == 2:
+            if not isinstance(arguments, list) or not len(arguments) == num_args:
                 raise FilterError(
-                    'Only binary/unary/simple callables are supported at this time'
+                    f'"{method}" arguments must be a list of size {num_args}.\n'
+                    f'Instead got: {arguments}'
                 )
 
-            if not isinstance(arguments, list):
-                arguments = [arguments]
-            return method(*arguments, translate=translate)
         else:
             raise FilterError(
-                f'{method} is not a valid filter'
+                'Only binary/unary/simple callables are supported at this time'
             )
+
+        if not isinstance(arguments, list):
+            arguments = [arguments]
+        return fn(*arguments, translate=translate)
+    else:
+        raise FilterError(
+            f'{method} is not a valid filter'
+        )
+
+
+# cache of built filters/expressions
+# key: (JSON of input, id of translating resource)
+# value: (translating resource, result)
+BUILD_CACHE_SIZE = 1024
+_build_cache = {}
+_build_cache_lock = threading.Lock()
+
+
+def _build_cached(build, value, translate=None):
+    try:
+        key = (build.__name__, json.dumps(value), id(translate))
+    except (TypeError, ValueError):
+        # not serializable, cannot be cached
+        return build(value, translate=translate) if translate else build(value)
+
+    cached = _build_cache.get(key)
+    if cached is not None and cached[0] is translate:
+        return cached[1]
+
+    result = build(value, translate=translate) if translate else build(value)
+    with _build_cache_lock:
+        if len(_build_cache) >= BUILD_CACHE_SIZE:
+            # evict the oldest entry
+            _build_cache.pop(next(iter(_build_cache)), None)
+        _build_cache[key] = (translate, result)
+    return result
+
+
+def get_filter(where, translate=None):
+    """Cached version of make_filter
+
+    Q objects are not modified when used in querysets,
+    so the same object can be shared across requests
+    """
+    return _build_cached(make_filter, where, translate=translate)
+
+
+def get_expression(value):
+    """Cached version of make_expression"""
+    return _build_cached(make_expression, value)
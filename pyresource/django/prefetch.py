@@ -5,7 +5,7 @@ Added support for nested-prefetch-limits via window functions
 
 from collections import defaultdict
 import copy
-import traceback
+import logging
 
 from django.db import models
 from django.db.models import Prefetch, QuerySet, Window
@@ -33,6 +33,8 @@ def get_manager(self, model):
 
 With.get_manager = get_manager
 
+logger = logging.getLogger(__name__)
+
 
 # dict/object
 class Record(dict):
@@ -165,8 +167,8 @@ class FastQueryCompatMixin(object):
                         "Prefetch for field '%s' already exists."
                     )
                 self.prefetches[arg.field] = arg
-        except Exception as e:  # noqa
-            traceback.print_exc()
+        except Exception:
+            logger.exception('Failed to add prefetch')
 
         return self
 
@@ -207,16 +209,18 @@ class FastQueryCompatMixin(object):
         else:
             # use custom logic (default)
             queryset = self.queryset
-            count = queryset.count()
-            if count > 1:
+            if args or kwargs:
+                queryset = queryset.filter(*args, **kwargs)
+            # fetch up to two rows in one query instead of counting first
+            data = list(self._get_values(queryset)[:2])
+            if len(data) > 1:
                 raise queryset.model.MultipleObjectsReturned()
-            elif count == 0:
+            elif not data:
                 raise queryset.model.DoesNotExist()
-            data = self._get_values(queryset)[0]
             # merge the prefetches
-            self.merge_prefetches([data])
+            self.merge_prefetch(data)
             # return as Record
-            return Record(data, pk_field=self.pk_field)
+            return Record(data[0], pk_field=self.pk_field)
 
     def first(self, *args, **kwargs):
         as_object = kwargs.pop('as_object', False)
@@ -392,6 +396,37 @@ class FastQuery(FastQueryCompatMixin, object):
 
         return self._ids
 
+    def _limit_per_parent(self, base_qs, partition_field, filters):
+        """Apply the limits of a sliced queryset to each parent
+
+        Slicing a prefetch queryset limits the related records of each
+        parent, not the related records overall.
+        Removes the limits, then uses CTE + RowNumber
+        to re-introduce them using window functions
+        """
+        base_qs = base_qs._clone()
+        low, high = get_limits(base_qs)
+        clear_limits(base_qs)
+        order_by = base_qs.query.order_by
+        if not order_by:
+            # if there is no order, we need to use pk
+            order_by = ['pk']
+        cte = With(
+            base_qs.annotate(**{
+                '..row': Window(
+                    expression=RowNumber(),
+                    partition_by=[partition_field],
+                    order_by=order_by
+                )
+            }).filter(**filters)
+        )
+        filters = {'..row__gt': low}
+        if high is not None:
+            filters['..row__lte'] = high
+        return cte.queryset().with_cte(cte).filter(
+            **filters
+        ).order_by(*order_by).distinct()
+
     def merge_fk(self, data, field, prefetch):
         # Strategy: pull out field_id values from each row, pass to
         #           prefetch queryset using `pk__in`.
@@ -401,7 +436,13 @@ class FastQuery(FastQueryCompatMixin, object):
         ids = set([
             row[id_field] for row in data if id_field in row
         ])
-        prefetched_data = prefetch.query.get_ids(ids).execute()
+        query = prefetch.query
+        if has_limits(query.queryset):
+            # there is at most one related object per row:
+            # limits only apply to many-related prefetches
+            query = query._clone()
+            clear_limits(query.queryset)
+        prefetched_data = query.get_ids(ids).execute()
         id_map = self._make_id_map(prefetched_data)
 
         for row in data:
@@ -428,7 +469,18 @@ class FastQuery(FastQueryCompatMixin, object):
         filter_args = {remote_filter_key: ids}
 
         # Fetch remote objects
-        remote_objects = prefetch.query.filter(**filter_args).execute()
+        query = prefetch.query
+        if has_limits(query.queryset):
+            # limits apply to the remote objects of each local object
+            query = query._clone()
+            if m2o_mode:
+                remote_pk_field = query.model._meta.pk.attname
+                joins = self._limit_per_parent(
+                    query.queryset, remote_field, filter_args
+                ).values_list(remote_pk_field, flat=True)
+                filter_args = {'pk__in': list(joins)}
+            clear_limits(query.queryset)
+        remote_objects = query.filter(**filter_args).execute()
         id_map = self._make_id_map(data, pk_field=self.pk_field)
 
         to_attr = prefetch.to_attr or prefetch.field
@@ -491,27 +543,7 @@ class FastQuery(FastQueryCompatMixin, object):
                 f'{reverse_field}__in': ids
             }
             if has_limits(base_qs):
-                # remove limits, then use CTE + RowNumber
-                # to re-introduce them using window functions
-                base_qs = base_qs._clone()
-                low, high = get_limits(base_qs)
-                clear_limits(base_qs)
-                order_by = base_qs.query.order_by
-                if not order_by:
-                    # if there is no order, we need to use pk
-                    order_by = ['pk']
-                cte = With(
-                    base_qs.annotate(**{
-                        '..row': Window(
-                            expression=RowNumber(),
-                            partition_by=[reverse_field],
-                            order_by=order_by
-                        )
-                    }).filter(**filters)
-                )
-                joins = cte.queryset().with_cte(cte).filter(
-                    **{'..row__lte': high, '..row__gt': low}
-                ).order_by(*order_by).distinct()
+                joins = self._limit_per_parent(base_qs, reverse_field, filters)
             else:
                 # no limits, use simple filtering
                 joins = base_qs.filter(**filters)
@@ -1,5 +1,6 @@
 from pyresource.exceptions import SchemaResolverError
 
+from django.apps import apps
 from django.db import models
 from django.db.models.fields import NOT_PROVIDED
 from django.db.models.fields.related import ManyToManyRel, ManyToOneRel
@@ -10,12 +11,36 @@ from pyresource.resolver import SchemaResolver
 from pyresource.utils import type_add_null
 
 
+# Django field class -> (type, whether the type can be null)
+# looked up along the field's MRO, so subclasses match their closest base
+FIELD_TYPES = {
+    models.DecimalField: ('number', True),
+    models.FloatField: ('number', True),
+    models.IntegerField: ('number', True),
+    models.BooleanField: ('boolean', False),
+    models.NullBooleanField: (('null', 'boolean'), False),
+    models.DurationField: ('string', True),
+    models.ImageField: ('string', True),
+    models.CharField: ('string', True),
+    models.TextField: ('string', True),
+    models.UUIDField: ('string', True),
+    models.GenericIPAddressField: ('string', True),
+    models.DateTimeField: ('string', True),
+    models.DateField: ('string', True),
+    models.TimeField: ('string', True),
+    models.FileField: ('string', True),
+}
+
+
 class DjangoSchemaResolver(SchemaResolver):
     # META_FIELDS: these fields can be inferred from Django models + field source
     META_FIELDS = {'type', 'default', 'choices', 'description', 'unique', 'primary', 'index'}
 
-    def __init__(self, *args, **kwargs):
-        self._models = {}
+    # shared by all resolver instances
+    # model source (e.g. "auth.user") -> Django model
+    _models = {}
+    # (model, field name) -> Django field
+    _fields = {}
 
     def get_field_source_names(self, source):
         source = self.get_model(source)
@@ -33,50 +58,30 @@ class DjangoSchemaResolver(SchemaResolver):
         return True
 
     def get_default(self, source, field, space=None):
-        model = self.get_model(source)
-        try:
-            field = self.get_field(model, field)
-        except TypeError:
+        field = self._get_model_field(source, field)
+        if field is None:
             return None
 
-        default = getattr(field, 'default', None)
-        if default == NOT_PROVIDED:
-            default = None
-        return default
+        default = field.default
+        return None if default is NOT_PROVIDED else default
 
     def get_type(self, source, field, space=None):
         model = self.get_model(source)
         field_name = field
         field = self.get_field(model, field_name)
 
-        if isinstance(
-            field, (
-                models.DecimalField,
-                models.FloatField,
-                models.IntegerField
-            )
-        ):
-            return type_add_null(field.null, 'number')
-        elif isinstance(field, models.BooleanField):
-            return 'boolean'
-        elif isinstance(field, models.NullBooleanField):
-            return ['null', 'boolean']
-        elif isinstance(
-            field, (
-                models.DurationField,
-                models.ImageField,
-                models.CharField,
-                models.TextField,
-                models.UUIDField,
-                models.GenericIPAddressField,
-                models.DateTimeField,
-                models.DateField,
-                models.TimeField,
-                models.FileField,
-            )
-        ):
-            return type_add_null(field.null, 'string')
-        elif isinstance(field, postgres.ArrayField):
+        for cls in type(field).__mro__:
+            entry = FIELD_TYPES.get(cls)
+            if entry:
+                field_type, nullable = entry
+                if isinstance(field_type, tuple):
+                    # return a new list, type_add_null may change it
+                    field_type = list(field_type)
+                if nullable:
+                    return type_add_null(field.null, field_type)
+                return field_type
+
+        if isinstance(field, postgres.ArrayField):
             # TODO: infer nested field type
             return type_add_null(field.null, 'array')
         elif isinstance(field, postgres.JSONField) or (
@@ -98,8 +103,8 @@ class DjangoSchemaResolver(SchemaResolver):
             related_model = field.related_model
             related = '.'.join((related_model._meta.app_label, related_model._meta.model_name))
             related = space.get_resource_for(related)
-            type = f'@{related.name}' if related else self.get_pk_type(related_model)
-            return {'type': 'array', 'items': type} if many else type
+            related_type = f'@{related.name}' if related else self.get_pk_type(related_model)
+            return {'type': 'array', 'items': related_type} if many else related_type
 
     def get_pk_type(self, model):
         pk_field = model._meta.pk
@@ -110,91 +115,85 @@ class DjangoSchemaResolver(SchemaResolver):
             return 'number'
 
     def get_choices(self, source, field, space=None):
-        model = self.get_model(source)
-        try:
-            field = self.get_field(model, field)
-        except TypeError:
+        field = self._get_model_field(source, field)
+        if field is None:
             return None
-
-        choices = getattr(field, 'choices', None)
-        if not choices:
-            return None
-        return choices
+        return field.choices or None
 
     def get_description(self, source, field, space=None):
         """Get field description"""
-        model = self.get_model(source)
-        try:
-            field = self.get_field(model, field)
-        except TypeError:
+        field = self._get_model_field(source, field)
+        if field is None:
             return None
-
-        try:
-            doc = field.help_text
-        except AttributeError:
-            doc = None
-
-        if not doc:
-            doc = None
-        return doc
+        return field.help_text or None
 
     def get_unique(self, source, field, space=None):
-        model = self.get_model(source)
-        try:
-            field = self.get_field(model, field)
-        except TypeError:
-            return False
-        return getattr(field, 'unique', False)
+        field = self._get_model_field(source, field)
+        return field.unique if field is not None else False
 
     def get_primary(self, source, field, space=None):
-        model = self.get_model(source)
-        try:
-            field = self.get_field(model, field)
-        except TypeError:
-            return False
-        return getattr(field, 'primary_key', False)
+        field = self._get_model_field(source, field)
+        return field.primary_key if field is not None else False
 
     def get_index(self, source, field, space=None):
+        field = self._get_model_field(source, field)
+        return field.db_index if field is not None else False
+
+    def _get_model_field(self, source, field):
+        """Get a Django model field, or None
+
+        Reverse relations and generic (private) fields are not model fields
+        and have no default, help text, or index options
+        """
         model = self.get_model(source)
         try:
             field = self.get_field(model, field)
         except TypeError:
-            return False
-        return getattr(field, 'db_index', False)
+            return None
+        return field if isinstance(field, models.Field) else None
 
     def get_field(self, model, field, space=None):
         if isinstance(field, dict) and field.get('queryset'):
             queryset = field['queryset']
             field = queryset.get('field')
-        return model._meta.get_field(field)
+        if not isinstance(field, str):
+            # not cacheable, let Django raise the error
+            return model._meta.get_field(field)
+
+        key = (model, field)
+        fields = self._fields
+        if key not in fields:
+            # may raise FieldDoesNotExist
+            fields[key] = model._meta.get_field(field)
+        return fields[key]
 
     def get_model(self, source):
         if not source:
             raise SchemaResolverError('Invalid source (empty)')
 
         src = self.get_model_source(source)
-        models = self._models
         if not isinstance(src, str):
-            import pdb
-            pdb.set_trace()
-        if src not in models:
-            # resolve model at this time if provided, throwing an error
-            # if it does not exist or if Django is not imported
-            from django.apps import apps
+            raise SchemaResolverError(f'Invalid source (no model): {source}')
 
+        models = self._models
+        model = models.get(src)
+        if model is None:
+            # resolve model at this time if provided,
+            # throwing an error if it does not exist
             try:
                 app_label, model_name = src.split(".")
             except Exception:
                 raise SchemaResolverError(f'Invalid source (too many dots): {source}')
 
             try:
-                models[source] = apps.get_model(app_label=app_label, model_name=model_name)
+                model = apps.get_model(app_label=app_label, model_name=model_name)
             except Exception as e:
                 raise SchemaResolverError(
                     f'Invalid source (not a registered model): {source}\n'
                     f'Error: {e}'
                 )
-        return models[src]
+            models[src] = model
+        return model
 
 
 resolver = DjangoSchemaResolver()
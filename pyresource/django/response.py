@@ -0,0 +1,41 @@
+import json
+from django.http import HttpResponse
+from pyresource.utils import json_default
+try:
+    # optional, faster JSON encoding
+    import orjson
+except ImportError:
+    orjson = None
+    ORJSON_OPTIONS = None
+else:
+    # encode like the json module: non-str keys are allowed,
+    # dates and dataclasses are stringified by json_default
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class JSONResponse(HttpResponse):
+    """JSON response, encoded with orjson if it is installed
+
+    Serialized data is already JSON-native, other values
+    (e.g. in errors) are encoded like they are in serialization
+
+    Arguments:
+        data: data to encode
+        safe: if True, only dicts can be encoded (as in JsonResponse)
+    """
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        if orjson is not None:
+            content = orjson.dumps(data, default=json_default, option=ORJSON_OPTIONS)
+        else:
+            content = json.dumps(data, default=json_default, separators=(',', ':'))
+        super().__init__(content=content, **kwargs)
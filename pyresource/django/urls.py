@@ -1,6 +1,6 @@
 from urllib.parse import urlparse
 from django.urls import re_path
-from django.http import JsonResponse
+from .response import JSONResponse
 
 
 methods_to_actions = {
@@ -40,7 +40,7 @@ def make_dispatch(server, base):
                     f'unsupported method {method}'
                 )
             query = query.action(action)
-        response = query.execute(response=JsonResponse, request=request)
+        response = query.execute(response=JSONResponse, request=request)
         return response
     return dispatch
 
@@ -55,7 +55,17 @@ class SerializationError(Exception):
 
 
 class RequestError(Exception):
-    pass
+    """Request error with an HTTP status code
+
+    Raise a subclass, or pass the status directly:
+    RequestError('rate limited', code=429)
+    """
+    code = 500
+
+    def __init__(self, *args, code=None):
+        super().__init__(*args)
+        if code is not None:
+            self.code = code
 
 
 class BadRequest(RequestError):
@@ -85,7 +95,7 @@ class MethodNotAllowed(RequestError):
 
 class RequestTimeout(RequestError):
     """408 request timeout"""
-    code = 409
+    code = 408
 
 
 class Conflict(RequestError):
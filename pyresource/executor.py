@@ -1,16 +1,29 @@
 import base64
 import json
-import copy as _copy
 
 from .record import Record
 from .exceptions import SerializationError, MethodNotAllowed, RequestError, ResourceMisconfigured
 from .conf import settings
 from .resolver import SchemaResolver, RequestResolver
 from .response import Response
-from .utils import get
-from .expression import execute
+from .utils import json_default, make_getter
+from .expression import compile_expression
 from .features import LEVELED_FEATURES, ROOT_FEATURES
+from .query import clone_state
 from .utils.types import get_link
+try:
+    # optional, faster JSON encoding
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# types that JSON supports natively, checked by exact type
+JSON_TYPES = {bool, str, int, float, type(None)}
+# marks a value that is not in a record
+MISSING = object()
+# cursors are URL-safe base64, older cursors use the standard alphabet
+CURSOR_ALPHABET = bytes.maketrans(b"+/", b"-_")
 
 
 def get_executor_class(engine):
@@ -27,35 +40,68 @@ def get_executor_class(engine):
 class Inspection:
     @classmethod
     def _get_query_state(cls, query, level=None, copy=False):
+        """Get the query state at a given level
+
+        States are derived once per query and level:
+        the result is shared and must not be changed unless copy=True
+        """
+        cache = query._state_cache
+        try:
+            state = cache[level]
+        except KeyError:
+            state = cache[level] = cls._make_query_state(query, level)
+        if copy:
+            state = clone_state(state)
+        return state
+
+    @classmethod
+    def _make_query_state(cls, query, level=None):
+        """Uncached implementation of _get_query_state"""
         root = query.state
         field = root.get("field")
         if not field:
-            state = query.get_state(level)
-            if copy:
-                state = _copy.deepcopy(state)
-            return state
+            return query.get_state(level)
 
-        copy = True  # TODO
-        state = None
+        # the result is always a new dict without the other
+        # level's features, built in a single pass
         if level is None:
             # no state at the root, use initial state
             # remove all of the leveled features
-            if copy:
-                state = _copy.copy(root)
-                for feature in LEVELED_FEATURES:
-                    state.pop(feature, None)
-            else:
-                state = root
+            return {
+                key: value for key, value in root.items()
+                if key not in LEVELED_FEATURES
+            }
         else:
             # shift the level, remove root features
             level = level.split(".")[1:] or None
             state = query.get_state(level)
-            if copy:
-                state = _copy.copy(state)
-                for feature in ROOT_FEATURES:
-                    state.pop(feature, None)
+            if not isinstance(state, dict):
+                # e.g. True for links
+                return state
+            return {
+                key: value for key, value in state.items()
+                if key not in ROOT_FEATURES
+            }
 
-        return state
+    @classmethod
+    def _get_request_cache(cls, request, name):
+        """Get a named cache that lives as long as the request
+
+        All of the caches are kept in one dict on the request,
+        so that they share a lifetime and can be cleared together
+
+        Returns:
+            dict, or None if there is no request
+        """
+        if request is None:
+            return None
+        caches = getattr(request, '_pyresource_cache', None)
+        if caches is None:
+            caches = request._pyresource_cache = {}
+        cache = caches.get(name)
+        if cache is None:
+            cache = caches[name] = {}
+        return cache
 
     @classmethod
     def _merge_meta(cls, meta, other, name):
@@ -65,12 +111,14 @@ class Inspection:
 
 
 class Selection:
-    # TODO: @cache results by all arguments to avoid recomputing this across different phases
-    # of the same request (e.g. serialization and query building)
     @classmethod
     def _take_fields(cls, resource, action, level=None, query=None, request=None):
         """Get a subset of a resource's fields to be used for an action
 
+        Results are cached on the query, per request, so that different
+        phases of the same request (e.g. query building and serialization)
+        do not recompute them. The cache is cleared when the query changes
+
         Arguments:
             resource: a Resource
             action: action string (ex: "get")
@@ -78,6 +126,27 @@ class Selection:
             query: a Query
             request: a Django Request object
         """
+        if query is None:
+            return cls._select_fields(
+                resource, action, level=level, query=query, request=request
+            )
+
+        cache = query._state_cache
+        # the request is kept in the value to guard against id reuse
+        key = ('take_fields', resource.id, action, level, id(request))
+        cached = cache.get(key)
+        if cached is not None and cached[0] is request:
+            return cached[1]
+
+        result = cls._select_fields(
+            resource, action, level=level, query=query, request=request
+        )
+        cache[key] = (request, result)
+        return result
+
+    @classmethod
+    def _select_fields(cls, resource, action, level=None, query=None, request=None):
+        """Uncached implementation of _take_fields"""
         result = []
         fields = resource.fields
         # if this is a field-oriented request
@@ -103,6 +172,7 @@ class Selection:
                 for name in group.keys()
             ]
 
+        take_defaults = take.get("*", False) if take is not None else None
         for field in fields:
             if take_field and level is None:
                 # take this field only
@@ -117,7 +187,7 @@ class Selection:
             # many fields
 
             # use query filters (take)
-            if not cls._should_take_field(field, take):
+            if not cls._should_take_field(field, take, take_defaults):
                 continue
 
             # use permission filters (can)
@@ -128,11 +198,19 @@ class Selection:
         return result
 
     @classmethod
-    def _should_take_field(cls, field, take):
-        """Return True if the field should be taken as requested"""
+    def _should_take_field(cls, field, take, take_defaults=None):
+        """Return True if the field should be taken as requested
+
+        Arguments:
+            field: a Field
+            take: "take" state or None
+            take_defaults: take["*"], can be passed in to avoid
+                looking it up for every field
+        """
         if take is not None:
             # if provided, use "take" to refine field selection
-            take_defaults = take.get("*", False)
+            if take_defaults is None:
+                take_defaults = take.get("*", False)
             should_take = take.get(field.name, None)
             if should_take is False:
                 # explicitly requested not to take this
@@ -243,68 +321,135 @@ class Authorization:
             return False
 
     @classmethod
-    def _can_take_field(cls, field, action, query=None, request=None):
-        can = field.can
+    def _get_field_can(cls, field, action):
+        """Get a field's "depends" and its "can" for a given action
+
+        "can" is merged with the default field permissions.
+        The result is cached on the field, per action, until
+        the default field permissions are reconfigured.
+        Expressions are compiled once, when they are cached.
+        Static results (no expression to evaluate) are also
+        cached separately, see _can_take_field
+
+        Returns:
+            tuple of (can, depends):
+                can: True/False, or a compiled expression
+                depends: None, or a compiled expression
+        """
         default = settings.FIELD_CAN
-        depends = field.depends
+        cache = field._can_cache
+        if cache is None or cache[0] is not default:
+            cache = field._can_cache = (default, {}, {})
+
+        actions = cache[1]
+        if action not in actions:
+            can = field.can
+            if can is None:
+                can = default
+            elif default is not None:
+                # field settings override the defaults
+                can = {**default, **can}
+
+            if can is not None:
+                can = can.get(action, False)
+            else:
+                can = True
+            if not isinstance(can, bool):
+                can = compile_expression(can)
+
+            depends = field.depends
+            if depends is not None:
+                depends = compile_expression(depends)
+            elif isinstance(can, bool):
+                # static result, the same for every request
+                cache[2][action] = can
+            actions[action] = (can, depends)
+        return actions[action]
 
-        if can is None:
-            can = default
-        elif default is not None:
-            default = _copy.copy(default)
-            default.update(can)
-            can = default
+    @classmethod
+    def _can_take_field(cls, field, action, query=None, request=None):
+        cache = field._can_cache
+        if cache is not None and cache[0] is settings.FIELD_CAN:
+            # common case: a static result, nothing to evaluate
+            static = cache[2].get(action)
+            if static is not None:
+                return static
+
+        can, depends = cls._get_field_can(field, action)
+        if depends is None and can is True:
+            return True
 
+        context = {"request": request, "query": query.state, "globals": settings}
         if depends is not None:
             # if this fields has a "depends", it is an expression that must evaluate truthy
-            ok = execute(depends, {"request": request, "query": query.state, "globals": settings})
-            if not ok:
+            if not depends(context):
                 return False
 
-        if can is not None:
-            if action in can:
-                can = can[action]
-                if isinstance(can, dict):
-                    can_dict = can
-                    can = execute(can, {"request": request, "query": query.state, "globals": settings})
-                return can
-            return False
-        else:
-            return True
+        if can is True or can is False:
+            return can
+        return can(context)
 
 
 class Serialization:
     @classmethod
-    def _to_json_value(self, value):
-        """Get a JSON-compatible representation of the given value"""
-        if isinstance(value, (list, tuple)):
-            return [self._to_json_value(v) for v in value]
+    def _to_json_value(cls, value, *, _json_types=JSON_TYPES):
+        """Get a JSON-compatible representation of the given value
 
-        if isinstance(value, dict):
-            return {
-                self._to_json_value(k): self._to_json_value(v) for k, v in value.items()
-            }
+        Nested lists and dicts are converted with a stack instead of
+        a recursive call per container
 
-        if isinstance(value, (bool, str, int, float)) or value is None:
-            # whitelisted types: return as-is
-            # JSON can support these natively
+        Raises:
+            SerializationError if a container contains itself
+        """
+        if type(value) in _json_types:
+            # fast path for exact native types
             return value
 
-        # special handling for files (FieldField fields, FieldFile values)
-        # check for and use .url property if it exists
-        try:
-            url = getattr(value, "url", None)
-        except Exception:
-            # there is a url property , but could not resolve it
-            return None
-        else:
-            # there is no url property
-            if url is not None:
-                value = url
-
-        # stringify everything else
-        # e.g. datetime, time, uuid, model instances, etc
-        return str(value)
+        result = [None]
+        # (value, target container, key or index in target)
+        stack = [(value, result, 0)]
+        pop = stack.pop
+        push = stack.append
+        # ids of the containers being converted: the parents of the current value
+        parents = set()
+        while stack:
+            value, target, key = pop()
+            if target is None:
+                # all items of this container are converted
+                parents.discard(value)
+                continue
+            if isinstance(value, (list, tuple, dict)):
+                parent = id(value)
+                if parent in parents:
+                    raise SerializationError(
+                        f"Cannot serialize circular reference in {type(value).__name__}"
+                    )
+                parents.add(parent)
+                # popped after all of the container's items
+                push((parent, None, None))
+            if isinstance(value, (list, tuple)):
+                # native items are copied as-is
+                items = list(value)
+                for i, v in enumerate(items):
+                    if type(v) not in _json_types:
+                        push((v, items, i))
+                value = items
+            elif isinstance(value, dict):
+                items = {}
+                for k, v in value.items():
+                    if type(k) not in _json_types:
+                        k = cls._to_json_value(k)
+                    items[k] = v
+                    if type(v) not in _json_types:
+                        push((v, items, k))
+                value = items
+            elif not isinstance(value, (bool, str, int, float)):
+                # subclasses of whitelisted types are returned as-is
+                # JSON can support these natively
+                # everything else: files, datetime, time, uuid, model instances, etc
+                value = json_default(value)
+            target[key] = value
+        return result[0]
 
     @classmethod
     def _serialize_value(cls, value):
@@ -314,11 +459,17 @@ class Serialization:
         - Represent all records by primary key (hence shallow)
         - Prepare result for JSON
         """
+        to_json = cls._to_json_value
         if isinstance(value, list):
-            value = [getattr(v, "pk", v) for v in value]
-        else:
-            value = getattr(value, "pk", value)
-        return cls._to_json_value(value)
+            # one pass: primary keys are usually JSON-native already
+            result = []
+            for v in value:
+                v = getattr(v, "pk", v)
+                result.append(v if type(v) in JSON_TYPES else to_json(v))
+            return result
+
+        value = getattr(value, "pk", value)
+        return value if type(value) in JSON_TYPES else to_json(value)
 
     @classmethod
     def _resolve_resource(cls, base_resource, name):
@@ -358,154 +509,359 @@ class Serialization:
         Returns:
             Serialized representation of record or list of records
         """
+        plan = cls._get_serialization_plan(
+            resource,
+            fields,
+            query=query,
+            level=level,
+            request=request,
+            meta=meta,
+            field_prefix=field_prefix
+        )
+        if isinstance(record, list):
+            return cls._apply_serialization_plan(plan, record)
+        return cls._apply_serialization_plan(plan, (record, ))[0]
+
+    @classmethod
+    def _get_serialization_plan(
+        cls,
+        resource,
+        fields,
+        query=None,
+        level=None,
+        request=None,
+        meta=None,
+        field_prefix=None
+    ):
+        """Get a serialization plan
+
+        The plan contains everything needed to serialize records of a resource
+        at a given level that does not depend on the records themselves,
+        so that it can be computed once and applied to many records
+
+        Arguments: see _serialize
+        Returns:
+            Record with plan data, including one entry per field
+        """
         if not field_prefix:
             field_prefix = ''
 
-        results = []
         state = cls._get_query_state(query, level=level)
         field_name = query.state.get("field", None)
-        page_size = state.get("page", {}).get("size", settings.PAGE_SIZE)
         take = state.get("take")
+        is_field_root = bool(field_name and not level)
+        take_root = is_field_root and query.state.get("take")
 
-        as_list = False
-        if isinstance(record, list):
-            as_list = True
-            records = record
+        steps = []
+        for field in fields:
+            name = field.name
+            link = cls._get_field_link(field)
+            # fallback source if the value is not in the record:
+            # ".a.b" is read from the context, "a.b" from the record
+            source = SchemaResolver.get_field_source(field.source) or name
+            from_context = source.startswith('.')
+            deep = bool(
+                take_root or (
+                    take is not None and isinstance(take.get(name), dict)
+                )
+            )
+            steps.append(Record(
+                field=field,
+                name=name,
+                record_key=f'{field_prefix}{name}',
+                source=source[1:] if from_context else source,
+                # compiled once, called for every record
+                getter=make_getter(source[1:] if from_context else source),
+                from_context=from_context,
+                link=link,
+                # shallow serializer: links are represented by primary key
+                serialize=cls._serialize_value if link else cls._to_json_value,
+                deep=deep,
+                # related resource for deep serialization
+                related=cls._resolve_resource(resource, link) if deep and link else None
+            ))
+
+        return Record(
+            resource=resource,
+            fields=steps,
+            query=query,
+            level=level,
+            request=request,
+            meta=meta,
+            field_prefix=field_prefix,
+            field_name=field_name,
+            is_field_root=is_field_root,
+            page_size=cls._get_page_size(query, level=level)
+        )
+
+    @classmethod
+    def _get_page_size(cls, query, level=None):
+        """Get the page size of the records at a given level"""
+        page = cls._get_query_state(query, level=level).get("page")
+        if not isinstance(page, dict):
+            return settings.PAGE_SIZE
+        return int(page.get("size", settings.PAGE_SIZE))
+
+    @classmethod
+    def _get_field_link(cls, field):
+        """Get the name of the resource linked by a field's type, or None
+
+        The result is cached on the field, unless it is a Record
+        """
+        if isinstance(field, dict):
+            return get_link(field.type)
+
+        link = field._type_link
+        if link is None:
+            # "" marks a field without a link
+            link = field._type_link = get_link(field.type) or ""
+        return link or None
+
+    @classmethod
+    def _get_record_value(cls, step, record, query=None, request=None, context=None):
+        """Get the raw value of a field from a record or from context
+
+        Arguments:
+            step: a field entry from a serialization plan
+            record: a dict or object
+            query: a Query
+            request: a Django request
+            context: the record's context, if it was already built
+        """
+        record_key = step.record_key
+        if record:
+            # get from record provided
+            # use special .name properties that are added as annotations
+            if isinstance(record, dict):
+                value = record.get(record_key, MISSING)
+                if value is not MISSING:
+                    return value
+            else:
+                try:
+                    return getattr(record, record_key)
+                except AttributeError as e:
+                    if record_key not in str(e):
+                        raise
+
+        # get from context (request/query data)
+        source = step.source
+        if step.from_context:
+            if context is None:
+                context = {
+                    "fields": record,
+                    "request": request,
+                    "query": query.state,
+                }
         else:
-            records = [record]
+            if record is None:
+                raise SerializationError(
+                    f"Source {source} must start with . because no record"
+                )
+            context = record
+        return step.getter(context)
+
+    @classmethod
+    def _apply_serialization_plan(
+        cls, plan, records, *, _json_types=JSON_TYPES, _missing=MISSING
+    ):
+        """Serialize a list of records using a plan
 
-        if records is None:
-            # special case for a singleton without a source
-            records = [None]
+        Serialization is done one field at a time across all records.
+        For fields that are serialized deeply, the related records of all
+        parent records are collected into one list and serialized
+        together, then split back between their parents
 
-        is_field_root = bool(field_name and not level)
-        for record in records:
-            result = {}
-            for field in fields:
-                name = field.name
-                record_key = f'{field_prefix}{name}'
-                use_context = True
-                if record:
-                    # get from record provided
-                    # use special .name properties that are added as annotations
-                    if isinstance(record, dict):
-                        try:
-                            value = record[record_key]
-                            use_context = False
-                        except KeyError as e:
-                            if record_key not in str(e):
-                                raise
-                    else:
-                        try:
-                            value = getattr(record, record_key)
-                            use_context = False
-                        except AttributeError as e:
-                            if record_key not in str(e):
-                                raise
-
-                if use_context:
-                    # get from context (request/query data)
-                    source = SchemaResolver.get_field_source(field.source) or name
-                    if source.startswith("."):
-                        context = {
-                            "fields": record,
-                            "request": request,
-                            "query": query.state,
-                        }
-                        source = source[1:]
-                    else:
-                        if record is None:
-                            raise SerializationError(
-                                f"Source {source} must start with . because no record"
+        Arguments:
+            plan: a plan from _get_serialization_plan
+            records: a list or tuple of records
+
+        Returns:
+            List of serialized records
+        """
+        resource = plan.resource
+        query = plan.query
+        request = plan.request
+        level = plan.level
+        # presized results, keys are in field order
+        names = [step.name for step in plan.fields]
+        results = [dict.fromkeys(names) for _ in records]
+        # records from querysets are dicts:
+        # their values can be read without a call per record
+        dict_records = all(isinstance(record, dict) for record in records)
+        # context for sources that start with ".",
+        # built once per record and shared by all such fields
+        contexts = None
+        get_record_value = cls._get_record_value
+        for step in plan.fields:
+            name = step.name
+            link = step.link if step.deep else None
+            if link:
+                related_level = name if level is None else f"{level}.{name}"
+                # deep relations are cut to their own level's page size,
+                # do not read more related records than that
+                page_size = cls._get_page_size(query, level=related_level)
+                limit = page_size + 1
+            else:
+                limit = None
+            if dict_records:
+                record_key = step.record_key
+                values = [record.get(record_key, _missing) for record in records]
+            else:
+                values = [_missing] * len(records)
+            if step.from_context and contexts is None:
+                query_state = query.state
+                contexts = [
+                    {"fields": record, "request": request, "query": query_state}
+                    for record in records
+                ]
+
+            if not step.deep:
+                # shallow serialization, read and serialize in one pass
+                serialize = step.serialize
+                for i, value in enumerate(values):
+                    if type(value) not in _json_types:
+                        if value is _missing:
+                            value = get_record_value(
+                                step,
+                                records[i],
+                                query=query,
+                                request=request,
+                                context=contexts[i] if contexts else None
                             )
-                        context = record
-                    value = get(source, context)
+                        if type(value) not in _json_types:
+                            # account for Django many-related managers
+                            all_ = getattr(value, "all", None)
+                            if all_ is not None and callable(all_):
+                                value = list(all_())
+                            value = serialize(value)
+                    results[i][name] = value
+                continue
 
-                if hasattr(value, "all") and callable(value.all):
+            for i, value in enumerate(values):
+                if type(value) in _json_types:
+                    # native values (most fields) are used as-is
+                    continue
+                if value is _missing:
+                    value = get_record_value(
+                        step,
+                        records[i],
+                        query=query,
+                        request=request,
+                        context=contexts[i] if contexts else None
+                    )
+                if type(value) not in _json_types:
                     # account for Django many-related managers
-                    value = list(value.all())
-
-                if (is_field_root and query.state.get("take")) or (
-                    take is not None and isinstance(take.get(name), dict)
-                ):
-                    # deep serialization
-                    link = get_link(field.type)
-                    if link:
-                        related = cls._resolve_resource(resource, link)
-                        if level is None:
-                            related_level = name
-                        else:
-                            related_level = f"{level}.{name}"
-
-                        if isinstance(value, list):
-                            if len(value) > page_size:
-                                # TODO: add pagination markers for this relationship
-                                # and do not render the next element
-                                value = value[:page_size]
-
-                        related_fields = cls._take_fields(
-                            related,
-                            action="get",
-                            level=related_level,
-                            query=query,
-                            request=request,
-                        )
-                        value = cls._serialize(
-                            related,
-                            related_fields,
-                            level=related_level,
-                            record=value,
-                            query=query,
-                            request=request,
-                            meta=meta,
-                            field_prefix=field_prefix
-                        )
-                    elif field_name is None:
-                        raise SerializationError(
-                            f'Cannot serialize relation for field "{resource.id}.{name}" with type {type}\n'
-                            f"Error: type has no link"
-                        )
+                    all_ = getattr(value, "all", None)
+                    if all_ is not None and callable(all_):
+                        # querysets apply the slice as a LIMIT,
+                        # or slice their cached results if prefetched
+                        value = list(all_()[:limit])
+                values[i] = value
+
+            if link:
+                # deep serialization
+                related = step.related
+                # flatten related records across all parents
+                # remembering which parent each related record came from
+                children = []
+                positions = []
+                for value in values:
+                    # many-related values were converted to plain lists above
+                    if isinstance(value, list):
+                        if len(value) > page_size:
+                            # prefetches are limited to page_size + 1 per parent
+                            # TODO: add pagination markers for this relationship
+                            # and do not render the next element
+                            value = value[:page_size]
+                        start = len(children)
+                        children.extend(value)
+                        positions.append(slice(start, len(children)))
+                    elif value is None:
+                        # empty relation
+                        positions.append(None)
                     else:
-                        value = cls._serialize_value(value)
-                else:
-                    # shallow serialization
-                    value = cls._serialize_value(value)
-
-                result[name] = value
-
-            results.append(result)
+                        positions.append(len(children))
+                        children.append(value)
+
+                if children:
+                    # only select related fields if there is something to serialize
+                    related_fields = cls._take_fields(
+                        related,
+                        action="get",
+                        level=related_level,
+                        query=query,
+                        request=request,
+                    )
+                    related_plan = cls._get_serialization_plan(
+                        related,
+                        related_fields,
+                        level=related_level,
+                        query=query,
+                        request=request,
+                        meta=plan.meta,
+                        field_prefix=plan.field_prefix
+                    )
+                    children = cls._apply_serialization_plan(related_plan, children)
+                for result, position in zip(results, positions):
+                    result[name] = None if position is None else children[position]
+            elif step.deep and plan.field_name is None:
+                raise SerializationError(
+                    f'Cannot serialize relation for field "{resource.id}.{name}" with type {step.field.type}\n'
+                    f"Error: type has no link"
+                )
+            else:
+                # shallow serialization of a field-oriented relation
+                serialize = step.serialize
+                for result, value in zip(results, values):
+                    result[name] = value if type(value) in _json_types else serialize(value)
 
-        if is_field_root:
+        if plan.is_field_root:
             # return one field only
+            field_name = plan.field_name
             results = [result[field_name] for result in results]
 
-        if not as_list:
-            results = results[0]
         return results
 
 
 class Pagination:
     @classmethod
     def _decode_cursor(self, cursor):
-        return json.loads(base64.b64decode(cursor))
+        if isinstance(cursor, str):
+            cursor = cursor.encode("ascii")
+        cursor = base64.urlsafe_b64decode(cursor.translate(CURSOR_ALPHABET))
+        return orjson.loads(cursor) if orjson else json.loads(cursor)
 
     @classmethod
     def _encode_cursor(self, cursor):
-        return base64.b64encode(json.dumps(cursor).encode("utf-8")).decode()
+        if orjson:
+            cursor = orjson.dumps(cursor)
+        else:
+            # compact, like orjson
+            cursor = json.dumps(cursor, separators=(",", ":")).encode("utf-8")
+        # cursors are passed in query strings
+        return base64.urlsafe_b64encode(cursor).decode("ascii")
 
     @classmethod
-    def _get_next_page(cls, query, offset=None, level=None):
-        # TODO: support keyset pagination
-        query = query.clone()
+    def _get_next_page(cls, query, offset=None, level=None, after=None):
+        """Get the encoded query for the next page
 
-        state = cls._get_query_state(query, level=level, copy=False)
+        Arguments:
+            query: the query for the current page
+            offset: number of records in the current page, defaults to the page size
+            level: level of the paginated records
+            after: keyset cursor values of the last record in the current page,
+                if not provided, falls back to offset pagination
+                from the position of the current page
+        """
+        # the state is shared: only its page is changed below,
+        # so only the state and page dicts are copied
+        state = dict(cls._get_query_state(query, level=level))
         page = state.get("page", {})
         size = int(page.get("size", settings.PAGE_SIZE))
         page = page.get("after", None)
         if page is not None:
             page = cls._decode_cursor(page)
 
-        # offset-limit pagination
         if offset is None:
             offset = size
         if page is None:
@@ -513,10 +869,16 @@ class Pagination:
         else:
             next_offset = page.get("offset", 0) + offset
 
-        cursor = cls._encode_cursor({"offset": next_offset})
-        if 'page' not in state:
-            state['page'] = {}
-        state['page']['after'] = cursor
+        if after is not None:
+            # keyset pagination, the offset is kept so that
+            # later pages can fall back to offset pagination
+            cursor = cls._encode_cursor({"after": after, "offset": next_offset})
+        else:
+            # offset-limit pagination
+            cursor = cls._encode_cursor({"offset": next_offset})
+        page = state.get('page')
+        page = state['page'] = dict(page) if isinstance(page, dict) else {}
+        page['after'] = cursor
         Query = query.__class__
         query = Query(state=state, server=query.server)
         return query.encode()
@@ -539,6 +901,7 @@ class Dispatch:
             if singleton:
                 # id provided, but really meant field
                 state['field'] = state.pop('id')
+                query._state_cache.clear()
                 endpoint = "field"
             else:
                 endpoint = "record"
@@ -1,5 +1,4 @@
-import re
-from .utils import resolve, get, is_literal, unliteral
+from .utils import get, is_literal, unliteral
 
 
 def object_expression(expression, context):
@@ -24,6 +23,23 @@ def or_expression(expression, context):
     return False
 
 
+def compile_or_expression(expression):
+    if not isinstance(expression, list) or not expression:
+        raise ValueError(f"or: list arguments expected, got {expression}")
+
+    expressions = [compile_expression(e) for e in expression]
+
+    def compiled(context):
+        for expression in expressions:
+            if bool(expression(context)):
+                return True
+        return False
+    return compiled
+
+
+or_expression.compile = compile_or_expression
+
+
 def and_expression(expression, context):
     """and with short-circuit execution"""
     if not isinstance(expression, list) or not expression:
@@ -37,6 +53,23 @@ def and_expression(expression, context):
     return True
 
 
+def compile_and_expression(expression):
+    if not isinstance(expression, list) or not expression:
+        raise ValueError(f"and: list arguments expected, got {expression}")
+
+    expressions = [compile_expression(e) for e in expression]
+
+    def compiled(context):
+        for expression in expressions:
+            if not bool(expression(context)):
+                return False
+        return True
+    return compiled
+
+
+and_expression.compile = compile_and_expression
+
+
 def get_expression(expression, context):
     """string getter"""
     if expression.startswith("."):
@@ -49,6 +82,26 @@ def get_expression(expression, context):
     return get(expression, context)
 
 
+def compile_get_expression(expression):
+    # paths are split once instead of on every call
+    if expression.startswith("."):
+        path = expression[1:].split(".")
+        return lambda context: get(path, context)
+
+    path = expression.split(".")
+    if expression.startswith("fields."):
+        return lambda context: get(path, context)
+
+    fields_path = ["fields"] + path
+
+    def compiled(context):
+        return get(fields_path if "fields" in context else path, context)
+    return compiled
+
+
+get_expression.compile = compile_get_expression
+
+
 def join_expression(expression, context):
     """string joiner, multiple signatures"""
     separator = None
@@ -70,22 +123,30 @@ def join_expression(expression, context):
     else:
         raise ValueError(f"join: expression is not supported: {expression}")
 
-    return separator.join([v for v in values if v])
+    return separator.join(filter(None, values))
+
+
+def get_unary_argument(expression):
+    if not expression:
+        raise ValueError(f"expecting an argument")
+    if isinstance(expression, list):
+        size = len(expression)
+        if size != 1:
+            raise ValueError(f"expecting exactly one argument, not {size}")
+        expression = expression[0]
+    return expression
 
 
 def make_unary_expression(final):
     def inner(expression, context):
-        if not expression:
-            raise ValueError(f"expecting an argument")
+        left = execute(get_unary_argument(expression), context)
+        return final(left)
 
-        if isinstance(expression, list):
-            size = len(expression)
-            if size != 1:
-                raise ValueError(f"expecting exactly one argument, not {size}")
+    def compile(expression):
+        left = compile_expression(get_unary_argument(expression))
+        return lambda context: final(left(context))
 
-        expression = expression[0]
-        left = execute(expression[0], context)
-        return final(left)
+    inner.compile = compile
     return inner
 
 
@@ -95,6 +156,14 @@ def make_binary_expression(final):
         left = execute(expression[0], context)
         right = execute(expression[1], context)
         return final(left, right)
+
+    def compile(expression):
+        assert len(expression) == 2
+        left = compile_expression(expression[0])
+        right = compile_expression(expression[1])
+        return lambda context: final(left(context), right(context))
+
+    inner.compile = compile
     return inner
 
 
@@ -102,12 +171,24 @@ def make_list_expression(final):
     def inner(expression, context):
         expression = [execute(expr, context) for expr in expression]
         return final(*expression)
+
+    def compile(expression):
+        expressions = [compile_expression(expr) for expr in expression]
+        return lambda context: final(*[expr(context) for expr in expressions])
+
+    inner.compile = compile
     return inner
 
 
-def negate(expression):
+def negate(method):
     def negated(expression, context):
-        return not execute(expression, context)
+        return not method(expression, context)
+
+    def compile(expression):
+        compiled = compile_method(method, expression)
+        return lambda context: not compiled(context)
+
+    negated.compile = compile
     return negated
 
 
@@ -192,18 +273,57 @@ def execute(expression, context):
         return expression
 
     if isinstance(expression, dict):
-        keys = list(expression.keys())
-        num_keys = len(keys)
-        method = keys[0]
-        if method in methods:
+        method = next(iter(expression))
+        fn = methods.get(method)
+        if fn is not None:
             # a known expression method
-            return methods[method](expression[method], context)
-        elif num_keys == 1:
+            return fn(expression[method], context)
+        elif len(expression) == 1:
             raise ValueError(f"execute: unknown expression operator: {method}")
         # multiple keys, use object expression
         return object_expression(expression, context)
 
     if isinstance(expression, str):
         # dotted.path
-        method = "get"
-        return methods[method](expression, context)
+        return get_expression(expression, context)
+
+
+def compile_method(method, argument):
+    """Compile a call to an expression method with the given argument"""
+    compile = getattr(method, "compile", None)
+    if compile is not None:
+        return compile(argument)
+    # no compiled form (e.g. join): execute on every call
+    return lambda context: method(argument, context)
+
+
+def compile_expression(expression):
+    """Compile an expression into a function of the context
+
+    Equivalent to execute, but the expression is parsed once:
+        compile_expression(expression)(context) == execute(expression, context)
+    """
+    if is_literal(expression):
+        value = unliteral(expression)
+        if isinstance(value, (dict, list)):
+            # do not share mutable values between calls
+            return lambda context: unliteral(expression)
+        return lambda context: value
+
+    if not expression:
+        # [], "", {}
+        return lambda context: expression
+
+    if isinstance(expression, dict):
+        # dicts with more than one key are literals
+        method = next(iter(expression))
+        fn = methods.get(method)
+        if fn is None:
+            raise ValueError(f"execute: unknown expression operator: {method}")
+        return compile_method(fn, expression[method])
+
+    if isinstance(expression, str):
+        # dotted.path
+        return compile_get_expression(expression)
+
+    return lambda context: None
@@ -1,4 +1,5 @@
 import re
+import sys
 
 PAGE = 'page'
 INSPECT = 'inspect'
@@ -16,14 +17,14 @@ RESOURCE = 'resource'
 PARAMETERS = 'parameters'
 
 
-LEVELED_FEATURES = {
+LEVELED_FEATURES = frozenset({
     GROUP,
     TAKE,
     SORT,
     WHERE,
     PAGE,
-}
-ROOT_FEATURES = {
+})
+ROOT_FEATURES = frozenset({
     INSPECT,
     ACTION,
     FIELD,
@@ -33,8 +34,11 @@ ROOT_FEATURES = {
     SPACE,
     RESOURCE,
     PARAMETERS
-}
+})
 FEATURES = LEVELED_FEATURES | ROOT_FEATURES
+# feature name -> the constant itself,
+# so that parsed keys are the same (interned) strings as the constants
+FEATURES_BY_NAME = {feature: feature for feature in FEATURES}
 
 FEATURE_REGEX = re.compile('^[-A-Za-z0-9_]+')
 FIELD_SEPARATOR_REGEX = re.compile('[^*A-Za-z0-9_-]')
@@ -47,11 +51,9 @@ def get_feature(key):
         feature or None if not a supported feature
     """
     feature = FEATURE_REGEX.match(key)
-    if feature:
-        feature = feature.group(0).lower()
-    else:
-        feature = None
-    return feature if feature in FEATURES else None
+    if not feature:
+        return None
+    return FEATURES_BY_NAME.get(feature.group(0).lower())
 
 
 def get_feature_separator(feature):
@@ -65,7 +67,7 @@ def get_sort_fields(value):
     if isinstance(value, list):
         value = ','.join(value)
 
-    return FIELD_SEPARATOR_REGEX.split(value)
+    return [sys.intern(field) for field in FIELD_SEPARATOR_REGEX.split(value)]
 
 
 def get_take_fields(value):
@@ -79,12 +81,15 @@ def get_take_fields(value):
         if field.startswith('-'):
             field = field[1:]
             show = False
-        result[field] = show
+        # field names are looked up in many dicts while executing
+        result[sys.intern(field)] = show
     return result
 
 
 class NestedFeature(object):
     """Helper class for Query"""
+    __slots__ = ('query', 'name', 'level')
+
     def __init__(self, query, name, level=None):
         self.query = query
         self.name = name
@@ -6,13 +6,23 @@ from .expression import execute
 from .schemas import FieldSchema
 from .exceptions import TypeValidationError
 
+# marks a link that has not been resolved yet
+UNSET = object()
 
-def is_resolved(x):
-    if isinstance(x, Resource):
+
+class ResolvedList(list):
+    """List of resources, resolved without checking each item"""
+    __slots__ = ()
+
+
+def is_resolved(x, *, _resource=Resource):
+    if isinstance(x, ResolvedList):
         return True
-    if isinstance(x, list) and all((isinstance(c, Resource) for c in x)):
+    if isinstance(x, _resource):
         return True
-    if isinstance(x, dict) and all((isinstance(c, Resource) for c in x.values())):
+    if isinstance(x, list) and all(isinstance(c, _resource) for c in x):
+        return True
+    if isinstance(x, dict) and all(isinstance(c, _resource) for c in x.values()):
         return True
     return False
 
@@ -20,12 +30,33 @@ def is_resolved(x):
 class Field(Resource):
     class Schema(FieldSchema):
         pass
+
+    # hot attributes are kept in slots,
+    # cached properties still use the instance dict
+    __slots__ = ('_type', '_value', '_setup', '_link_cache', '_ids', '_space')
+
     def __init__(self, *args, **kwargs):
         super(Field, self).__init__(*args, **kwargs)
-        type = self.get_option('type')
-        self._is_link = get_link(type)
-        self._is_list = is_list(type)
-        self._is_nullable = is_nullable(type)
+        self._type = self.get_option('type')
+        self._value = None
+        self._link_cache = UNSET
+        # ids of linked resources, built on the first add_value
+        self._ids = None
+        self._space = None
+
+    # type checks are done on first use,
+    # many fields are never linked or listed
+    @cached_property
+    def _is_link(self):
+        return get_link(self._type)
+
+    @cached_property
+    def _is_list(self):
+        return is_list(self._type)
+
+    @cached_property
+    def _is_nullable(self):
+        return is_nullable(self._type)
 
     @property
     def is_link(self):
@@ -42,28 +73,29 @@ class Field(Resource):
     def setup(self):
         if not self._setup:
             # set initial value via parent
-            source = self.get_option('source')
-            type = self.get_option('type')
-            name = self.get_option('name')
-            id = self.get_option('id')
+            # field options are plain values, read them directly
+            options = self._options
+            source = options.get('source')
 
             if source:
                 # get value from source expression
                 value = self.get_from_expression(source)
             else:
                 # get value from parent by name
-                default = self.get_option('default')
-                value = self.parent.get_option(name, default)
+                value = self.parent.get_option(
+                    options.get('name'), options.get('default')
+                )
 
             # transform field spec dict into field array
             if (
-                id == 'resources.fields'
+                options.get('id') == 'resources.fields'
             ):
                 if value == '*':
                     value = {k: True for k in self.parent.get_field_source_names()}
 
                 if isinstance(value, dict):
-                    value = [self.parent.get_field(name) for name in value]
+                    get_field = self.parent.get_field
+                    value = ResolvedList([get_field(name) for name in value])
 
             self.set_value(value)
 
@@ -86,9 +118,24 @@ class Field(Resource):
     def parent(self):
         return self.get_option('parent')
 
+    @cached_property
+    def _has_inverse(self):
+        return bool(self.inverse)
+
     @classmethod
     def make(cls, *args, **kwargs):
-        return cls(*args, **kwargs)  # lazy(lambda: cls(*args, **kwargs), cls)()
+        type = kwargs.get('type')
+        if cls is not Field or type is None:
+            return cls(*args, **kwargs)  # lazy(lambda: cls(*args, **kwargs), cls)()
+
+        # use a class specialized for the kind of field,
+        # without the per-call link/list/inverse checks
+        link = get_link(type)
+        flags = (bool(link), bool(is_list(type)), bool(kwargs.get('inverse')))
+        field = SPECIALIZED_FIELDS[flags](*args, **kwargs)
+        if link:
+            field.__dict__['_is_link'] = link
+        return field
 
     def get_value(self, resolve=True, id=False):
         self.setup()
@@ -100,7 +147,15 @@ class Field(Resource):
 
     @property
     def space(self):
-        return self.get_space()
+        """The field's space, found once by walking up its parents"""
+        space = self._space
+        if space is None:
+            space = self._space = self.get_space()
+        return space
+
+    def invalidate_space(self):
+        """Drop the cached space, e.g. after the field's parents change"""
+        self._space = None
 
     def get_space(self):
         from .space import Space
@@ -138,7 +193,7 @@ class Field(Resource):
         if is_resolved(value):
             return value
 
-        return self.space.resolve(self.type, value)
+        return self.space.resolve(self._type, value)
 
     def validate(self, type, value):
         try:
@@ -147,33 +202,29 @@ class Field(Resource):
             raise TypeValidationError(f'Failed to validate {self.id}: {e}')
 
     def set_value(self, value, set_inverse=True):
-        type = self.get_option('type')
-        self.validate(type, value)
+        self.validate(self._type, value)
         if self._is_link:
-            link = None
-
-            if is_resolved(value):
-                # resource given -> get ID or IDs
-                link = value
-                value = [v.get_id() for v in value] if self._is_list else link.get_id()
-
-                self._value = value
-                self.__dict__["_link"] = link
-                if set_inverse and self.inverse:
-                    self.set_inverse(link)
-            else:
-                # id or ids given
-                self._value = value
-                link = self.__dict__['_link'] = self.get_link(value)
-
-            if link and set_inverse and self.inverse:
-                self.set_inverse(link)
+            self._set_link(value, set_inverse and self._has_inverse)
         else:
             # simple assignment without links
             self._value = value
 
         self._setup = True
 
+    def _set_link(self, value, set_inverse):
+        self._ids = None
+        if is_resolved(value):
+            # resource given -> get ID or IDs
+            link = self._link_cache = value
+            value = [v.get_id() for v in value] if self._is_list else link.get_id()
+        else:
+            # id or ids given
+            link = self._link_cache = self.get_link(value)
+
+        self._value = value
+        if link and set_inverse:
+            self.set_inverse(link)
+
     def set_inverse(self, value):
         parent = self.parent
         if not parent:
@@ -183,68 +234,161 @@ class Field(Resource):
             value = [value]
 
         inverse = self.inverse
-
+        # each inverse field is updated once,
+        # even if its resource is linked more than once
+        inverse_fields = {}
         for v in value:
             inverse_field = v.get_attribute(inverse)
+            inverse_fields[id(inverse_field)] = inverse_field
+
+        parents = ResolvedList([parent])
+        for inverse_field in inverse_fields.values():
             if inverse_field._is_list:
-                inverse_field.add_value(parent, set_inverse=False)
+                inverse_field.add_value(parents, set_inverse=False)
             else:
                 inverse_field.set_value(parent, set_inverse=False)
 
     def add_value(self, new_value, set_inverse=True, index=None):
-        if self._is_list:
-            self.setup()
-
-            value = self._value
-            link = None
-
-            if value is None:
-                value = self._value = []
-
-            if not isinstance(new_value, list):
-                new_value = [new_value]
+        if not self._is_list:
+            # cannot add on a non-list
+            # TODO: support this for strings, objects, numbers
+            raise NotImplementedError()
 
-            ids = None
-            link = None
-            resolved = None
+        self.setup()
+        if not isinstance(new_value, list):
+            new_value = [new_value]
 
-            if self._is_link:
-                resolved = is_resolved(new_value)
-                link = self._link
-                ids = set([v.get_id() if hasattr(v, 'get_id') else v for v in link])
+        if self._is_link:
+            self._add_links(new_value, set_inverse and self._has_inverse)
+        else:
+            # add directly
+            self._add_values(new_value)
 
+    def _add_values(self, new_value):
+        value = self._value
+        if value is None:
+            self._value = new_value[:]
+        else:
+            value.extend(new_value)
+
+    def _add_links(self, new_value, set_inverse):
+        value = self._value
+        if value is None:
+            value = self._value = []
+
+        # the ids of the linked resources are kept in a set
+        # across calls, so each add only checks the new values
+        ids = self._ids
+        if ids is None:
+            ids = self._ids = set(value)
+        # resolve the current link before the value changes
+        link = self._link
+
+        if is_resolved(new_value):
             news = []
             for v in new_value:
-                if self._is_link:
-                    # check ids before adding
-                    if resolved:
-                        id = v.get_id()
-                        if id not in ids:
-                            ids.add(id)
-                            news.append(v)
-                            value.append(id)
-                            link.append(v)
-                    else:
-                        if v not in ids:
-                            ids.add(v)
-                            value.append(v)
-                            news.append(v)
-                else:
-                    # add directly
-                    value.append(v)
-
-            if self._is_link and not resolved:
+                id = v.get_id()
+                if id not in ids:
+                    ids.add(id)
+                    value.append(id)
+                    news.append(v)
+            link.extend(news)
+        else:
+            news = [id for id in dict.fromkeys(new_value) if id not in ids]
+            ids.update(news)
+            value.extend(news)
+            if news:
                 # news has ids
                 news = self.get_link(news)
                 link.extend(news)
 
-            if set_inverse and self.inverse and news:
-                self.set_inverse(news)
-        else:
-            # cannot add on a non-list
-            # TODO: support this for strings, objects, numbers
-            raise NotImplementedError()
+        if set_inverse and news:
+            self.set_inverse(news)
 
-    @cached_property
+    @property
     def _link(self):
-        return self.get_link(self._value)
+        """Linked resource(s), resolved from the value once"""
+        link = self._link_cache
+        if link is UNSET:
+            link = self._link_cache = self.get_link(self._value)
+        return link
+
+
+class ValueField(Field):
+    """Field that is neither a link nor a list"""
+    __slots__ = ()
+    _is_link = None
+    _is_list = False
+
+    def get_value(self, resolve=True, id=False):
+        self.setup()
+        return self._value
+
+    def set_value(self, value, set_inverse=True):
+        self.validate(self._type, value)
+        self._value = value
+        self._setup = True
+
+    def add_value(self, new_value, set_inverse=True, index=None):
+        raise NotImplementedError()
+
+
+class ListField(ValueField):
+    """Field that is a list of values"""
+    __slots__ = ()
+    _is_list = True
+
+    def add_value(self, new_value, set_inverse=True, index=None):
+        self.setup()
+        self._add_values(new_value if isinstance(new_value, list) else [new_value])
+
+
+class LinkField(Field):
+    """Field that links to a resource"""
+    __slots__ = ()
+    _is_list = False
+
+    def get_value(self, resolve=True, id=False):
+        self.setup()
+        if resolve:
+            link = self._link
+            return link.get_id() if id else link
+        return self._value
+
+    def set_value(self, value, set_inverse=True):
+        self.validate(self._type, value)
+        self._set_link(value, set_inverse and self._has_inverse)
+        self._setup = True
+
+    def add_value(self, new_value, set_inverse=True, index=None):
+        raise NotImplementedError()
+
+
+class LinkListField(LinkField):
+    """Field that links to a list of resources"""
+    __slots__ = ()
+    _is_list = True
+
+    def add_value(self, new_value, set_inverse=True, index=None):
+        self.setup()
+        self._add_links(
+            new_value if isinstance(new_value, list) else [new_value],
+            set_inverse and self._has_inverse
+        )
+
+
+# (is_link, is_list, has_inverse) -> Field class
+SPECIALIZED_FIELDS = {
+    (linked, listed, inverse): type(
+        base.__name__,
+        (base, ),
+        {'_has_inverse': inverse, '__module__': __name__, '__slots__': ()}
+    )
+    for (linked, listed), base in {
+        (False, False): ValueField,
+        (False, True): ListField,
+        (True, False): LinkField,
+        (True, True): LinkListField,
+    }.items()
+    for inverse in (False, True)
+}
@@ -1,14 +1,13 @@
 import json
 import base64
 from collections import defaultdict
-from urllib.parse import parse_qs
+from functools import lru_cache
+from urllib.parse import unquote_plus
 from .utils import (
-    merge as _merge,
-    cached_property,
+    merge_copy as _merge_copy,
     coerce_query_value,
     coerce_query_values,
 )
-from copy import deepcopy
 from .exceptions import QueryValidationError, QueryExecutionError
 from .features import (
     get_feature,
@@ -26,7 +25,47 @@ from .features import (
 from .boolean import WhereQueryMixin
 
 
+def clone_state(state):
+    """Copy a query state
+
+    States are JSON-like: only dicts and lists are copied,
+    without the memo and dispatch overhead of deepcopy
+    """
+    state_type = type(state)
+    if state_type is dict:
+        return {key: clone_state(value) for key, value in state.items()}
+    if state_type is list:
+        return [clone_state(value) for value in state]
+    return state
+
+
+@lru_cache(maxsize=1024)
+def split_level(level):
+    """Split a dotted level into its parts, e.g. "users.groups" """
+    return tuple(level.split("."))
+
+
+def iter_querystring(querystring):
+    """Iterate over the (key, value) pairs of a querystring
+
+    Same pairs as urllib.parse.parse_qs, in one pass:
+    fields without "=" or with blank values are skipped
+    """
+    for field in querystring.split("&"):
+        key, equals, value = field.partition("=")
+        if not value:
+            continue
+        if "%" in key or "+" in key:
+            key = unquote_plus(key)
+        if "%" in value or "+" in value:
+            value = unquote_plus(value)
+        yield key, value
+
+
 class Query(WhereQueryMixin):
+    # queries are created for every chained call
+    __slots__ = ('_state', 'server', '_state_cache', '_executor')
+
     # methods
     def __init__(self, state=None, server=None):
         """
@@ -35,9 +74,16 @@ class Query(WhereQueryMixin):
         """
         self._state = state or {}
         self.server = server
+        # executor-derived data (e.g. states by level)
+        # must be cleared when the state changes in place
+        self._state_cache = {}
+        self._executor = None
 
     def __call__(self, *args, **kwargs):
-        return self.from_querystring(*args, server=self.server, state=self.state)
+        # the new query updates its root state in place:
+        # copy it so that this query and its cached states are unchanged,
+        # the nested states are copied on write
+        return self.from_querystring(*args, server=self.server, state=dict(self.state))
 
     def add(self, id=None, field=None, **context):
         return self._call("add", id=id, field=field, **context)
@@ -63,9 +109,12 @@ class Query(WhereQueryMixin):
     def encode(self):
         return base64.b64encode(json.dumps(self.state).encode('utf-8')).decode()
 
-    @cached_property
+    @property
     def executor(self):
-        return self.server.get_executor(self)
+        executor = self._executor
+        if executor is None:
+            executor = self._executor = self.server.get_executor(self)
+        return executor
 
     def execute(self, request=None, **context):
         executor = self.executor
@@ -76,6 +125,7 @@ class Query(WhereQueryMixin):
         if "action" not in self.state:
             # add default action "get" into state
             self.state["action"] = action_name
+            self._state_cache.clear()
 
         action = getattr(executor, action_name, None)
         if not action:
@@ -187,21 +237,17 @@ class Query(WhereQueryMixin):
         return self._update({"take": kwargs}, copy=copy, level=level, merge=True)
 
     def _call(self, action, id=None, field=None, **context):
+        # action, id and field are set in one copy
+        args = {}
         if self.state.get("action") != action:
-            return getattr(self.action(action), action)(
-                id=id, field=field, **context
-            )
-
-        if id or field:
-            # redirect back through copy
-            args = {}
-            if id:
-                args["id"] = id
-            if field:
-                args["field"] = field
-            return getattr(self._update(args), action)(**context)
+            args["action"] = action
+        if id:
+            args["id"] = id
+        if field:
+            args["field"] = field
 
-        return self.execute(**context)
+        query = self._update(args) if args else self
+        return query.execute(**context)
 
     def _sort(self, level, *args, copy=True):
         """
@@ -224,44 +270,34 @@ class Query(WhereQueryMixin):
         return str(self.state)
 
     def clone(self):
-        return self._update()
+        return Query(state=clone_state(self.state), server=self.server)
 
     def _update(self, args=None, level=None, merge=False, copy=True, **kwargs):
         if args:
             kwargs = args
 
-        state = None
-        if copy:
-            state = deepcopy(self.state)
-        else:
-            state = self.state
+        # copy-on-write: only the dicts on the path to the updated level
+        # are copied, the other branches are shared with this query
+        # with copy=False, the root state is updated in place
+        state = dict(self._state) if copy else self._state
 
         sub = state
         # adjust substate at particular level
         # default: adjust root level
-        take = "take"
+        take = TAKE
         if level:
-            for part in level.split("."):
-                if take not in sub:
-                    sub[take] = {}
-
-                fields = sub[take]
-                try:
-                    new_sub = fields[part]
-                except KeyError:
-                    fields[part] = {}
-                    sub = fields[part]
-                else:
-                    if isinstance(new_sub, bool):
-                        fields[part] = {}
-                        sub = fields[part]
-                    else:
-                        sub = new_sub
+            for part in split_level(level):
+                fields = sub.get(take)
+                fields = sub[take] = dict(fields) if fields else {}
+                new_sub = fields.get(part)
+                # boolean or missing substates become empty
+                sub = fields[part] = dict(new_sub) if isinstance(new_sub, dict) else {}
 
         for key, value in kwargs.items():
             if merge and isinstance(value, dict) and sub.get(key):
-                # deep merge
-                _merge(value, sub[key])
+                # deep merge into a copy, the original may be shared:
+                # only the changed dicts are copied
+                sub[key] = _merge_copy(value, sub[key])
             else:
                 # shallow merge, assign the state
                 sub[key] = value
@@ -269,6 +305,7 @@ class Query(WhereQueryMixin):
         if copy:
             return Query(state=state, server=self.server)
         else:
+            self._state_cache.clear()
             return self
 
     def __getitem__(self, key):
@@ -276,11 +313,12 @@ class Query(WhereQueryMixin):
 
     def get_subquery(self, level=None):
         state = self.state
-        substate = self.get_state(level)
+        # copied: the substate is changed below
+        substate = dict(self.get_state(level))
         last_level = level.split('.')[-1] if level else None
-        for feature in ROOT_FEATURES:
-            if feature in state:
-                substate[feature] = state[feature]
+        # only the root features that are present
+        for feature in state.keys() & ROOT_FEATURES:
+            substate[feature] = state[feature]
 
         # resource-bound subqueries are resource-bound
         if last_level and not state.get('resource'):
@@ -295,22 +333,50 @@ class Query(WhereQueryMixin):
 
     @classmethod
     def _build_update(cls, parts, key, value):
-        update = {}
-        num_parts = len(parts)
         if not key:
-            update = value
-        elif num_parts:
-            update[key] = {}
-            current = update[key]
-            for i, part in enumerate(parts):
-                if i != num_parts - 1:
-                    current = current[part] = {}
-                else:
-                    current[part] = value
+            return value
+        num_parts = len(parts)
+        if num_parts == 0:
+            return {key: value}
+        if num_parts == 1:
+            return {key: {parts[0]: value}}
+        # build the chain from the innermost part outwards
+        for part in reversed(parts):
+            value = {part: value}
+        return {key: value}
 
-        else:
-            update[key] = value
-        return update
+    @classmethod
+    def _build_updates_batched(cls, updates):
+        """Combine consecutive merge updates at the same level
+
+        Arguments:
+            updates: list of (update, level, merge) arguments for _update
+        Returns:
+            list of (update, level, merge), where each merged update
+            has the same effect as applying its parts one after another
+        """
+        batched = []
+        last = None
+        for update, level, merge in updates:
+            if (
+                merge
+                and last is not None
+                and last[1] == level
+                and last[2]
+                and isinstance(update, dict)
+                and isinstance(last[0], dict)
+            ):
+                combined = last[0]
+                # same rules as _update(merge=True)
+                for key, value in update.items():
+                    if isinstance(value, dict) and combined.get(key):
+                        combined[key] = _merge_copy(value, combined[key])
+                    else:
+                        combined[key] = value
+            else:
+                last = (update, level, merge)
+                batched.append(last)
+        return batched
 
     @classmethod
     def decode_state(cls, state):
@@ -321,21 +387,73 @@ class Query(WhereQueryMixin):
 
     @classmethod
     def from_querystring(cls, querystring, **kwargs):
-        state = cls.decode_state(querystring)
+        state = kwargs.get("state")
+        type = "server"
+        if state:
+            if "resource" in state:
+                type = "resource"
+            elif "space" in state:
+                type = "space"
+
+        state, updates = cls._parse_querystring(querystring, type)
         if state is not None:
-            # querystring is encoded state
-            kwargs['state'] = state
+            # querystring is encoded state or ?query=encoded-query
+            kwargs['state'] = clone_state(state)
             return cls(**kwargs)
 
+        # parsed results are shared between calls, use copies
         result = cls(**kwargs)
-        state = kwargs.get("state")
+        for update, level, merge in updates:
+            result._update(clone_state(update), level=level, merge=merge, copy=False)
+        return result
 
-        type = "server"
-        if "resource" in state:
-            type = "resource"
-        elif "space" in state:
-            type = "space"
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _parse_key(cls, key):
+        """Parse a querystring key into its feature, level and parts
+
+        Results are cached: keys repeat across querystrings
+
+        Example:
+            "page.users:size" -> ("page", "users", ("size", ))
+            "foo" -> (None, None, ("foo", ))
+        """
+        feature = get_feature(key)
+        if feature is None:
+            # not a feature: a parameter
+            return None, None, (key, )
+
+        parts = key.split(get_feature_separator(feature))
+        feature_part = parts[0]
+        level = None
+        if "." in feature_part:
+            level = ".".join(feature_part.split(".")[1:]) or None
+        return feature, level, tuple(parts[1:])
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def _parse_querystring(cls, querystring, type):
+        """Parse a querystring into the updates of a query
 
+        Results are cached: repeated querystrings (e.g. pagination, polling)
+        are only parsed once, and must not be changed by the caller
+
+        Arguments:
+            querystring: querystring or encoded state
+            type: "server", "space" or "resource", the type of query
+                the querystring applies to
+        Returns:
+            tuple of (state, updates):
+                state: decoded state, or None if the querystring is not encoded
+                updates: list of (update, level, merge) arguments for _update,
+                    including the where expressions built from the querystring
+        """
+        state = cls.decode_state(querystring)
+        if state is not None:
+            # querystring is encoded state
+            return state, ()
+
+        updates = []
         remainder = None
         space = resource = field = id = None
         parts = querystring.split("?")
@@ -384,14 +502,18 @@ class Query(WhereQueryMixin):
             if field is not None:
                 update["field"] = field
             if update:
-                result._update(update, copy=False)
+                updates.append((update, None, False))
         else:
             raise ValueError(f"Invalid querystring: {querystring}")
 
+        query = {}
         if remainder:
-            query = parse_qs(remainder)
-        else:
-            query = {}
+            for key, value in iter_querystring(remainder):
+                values = query.get(key)
+                if values is None:
+                    query[key] = [value]
+                else:
+                    values.append(value)
 
         if QUERY in query:
             query = query[QUERY]
@@ -400,37 +522,22 @@ class Query(WhereQueryMixin):
             state = cls.decode_state(query)
             if state is not None:
                 # ?query=encoded-query
-                kwargs['state'] = state
-                return cls(**kwargs)
+                return state, ()
             else:
                 raise ValueError(f'Invalid query: {query}')
 
-        where = defaultdict(list)  # level -> [args]
+        where = defaultdict(list)  # level -> [(parts, value)]
         for key, value in query.items():
-            feature = get_feature(key)
-            separator = get_feature_separator(feature)
-            level = None
+            # parts are a cached tuple, shared between calls
+            feature, level, parts = cls._parse_key(key)
             if feature is None:
                 update_key = PARAMETERS
-                parts = [key]
                 value = coerce_query_values(value)
             else:
-                # determine level
-                parts = key.split(separator)
-                feature_part = parts[0]
-
-                if "." in feature_part:
-                    level = ".".join(feature_part.split(".")[1:])
-                    if not level:
-                        level = None
-
-                parts = parts[1:]
-
                 # handle WHERE separately because of special expression parsing
                 # that can join together multiple conditions
                 if feature == WHERE:
-                    parts.append(value)
-                    where[level].append(parts)
+                    where[level].append((parts, value))
                     continue
 
                 # coerce value based on feature name
@@ -444,15 +551,16 @@ class Query(WhereQueryMixin):
 
                 if update_key == "page" and not parts:
                     # default key for page = cursor
-                    parts = ["cursor"]
+                    parts = ("cursor", )
 
             update = cls._build_update(parts, update_key, value)
-            result._update(update, level=level, merge=feature != SORT, copy=False)
-        if where:
-            # WhereQueryMixin
-            # special handling
-            cls.update_where(result, where)
-        return result
+            updates.append((update, level, feature != SORT))
+        updates = cls._build_updates_batched(updates)
+        # WhereQueryMixin
+        # special handling: built once here, replayed like other updates
+        for level, expression in cls.build_where(where):
+            updates.append(({'where': expression}, level, False))
+        return None, updates
 
     @property
     def where(self):
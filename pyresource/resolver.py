@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from .exceptions import SchemaResolverError, RequestResolverError
 from .utils import is_literal, get, unliteral
 from .expression import execute, methods
@@ -74,30 +76,66 @@ class RequestResolver:
         and the expression can be interpretted in Python,
         the expression will be reduced into constants.
         """
-        if isinstance(data, dict):
-            result = {
-                cls.resolve(key, **context): cls.resolve(value, **context)
-                for key, value in data.items()
-            }
-            if len(result) == 1:
-                # possible expression that we can evaluate
-                key = next(iter(result))
-                value = result[key]
-                # resolve child arguments recursively
-                if key in methods and is_literal(value):
-                    value = unliteral(value)
-                    try:
-                        result, _ = execute({key: value}, context)
-                    except Exception as e:
-                        raise RequestResolverError(
-                            f'Failed to resolve {data} executing {key}({value})'
-                            f'{e.__class__.__name__}: {e}'
-                        )
-                    return result
-            return result
-        elif isinstance(data, list):
-            return [cls.resolve(dat, **context) for dat in data]
-        elif isinstance(data, str) and data.startswith('.'):
+        if not isinstance(data, (dict, list)):
+            return cls._resolve_value(data, context)
+
+        # nested data is resolved with a stack instead of
+        # a recursive call per node; each entry is
+        # (data, target container, key or index in target, resolved dict)
+        # where dicts are pushed again with their resolved copy,
+        # to be evaluated after their children
+        result = [None]
+        stack = [(data, result, 0, None)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            data, target, key, resolved = pop()
+            if resolved is not None:
+                target[key] = cls._evaluate(data, resolved, context)
+            elif isinstance(data, dict):
+                resolved = {}
+                push((data, target, key, resolved))
+                for k, v in data.items():
+                    k = cls._resolve_value(k, context)
+                    if isinstance(v, (dict, list)):
+                        # keep the key order, resolve the value later
+                        resolved[k] = None
+                        push((v, resolved, k, None))
+                    else:
+                        resolved[k] = cls._resolve_value(v, context)
+            elif isinstance(data, list):
+                items = target[key] = list(data)
+                for i, v in enumerate(data):
+                    if isinstance(v, (dict, list)):
+                        push((v, items, i, None))
+                    else:
+                        items[i] = cls._resolve_value(v, context)
+            else:
+                target[key] = cls._resolve_value(data, context)
+        return result[0]
+
+    @classmethod
+    def _evaluate(cls, data, result, context):
+        """Evaluate a resolved dict if it is an expression of constants"""
+        if len(result) == 1:
+            # possible expression that we can evaluate
+            key = next(iter(result))
+            value = result[key]
+            if key in methods and is_literal(value):
+                value = unliteral(value)
+                try:
+                    return execute({key: value}, context)
+                except Exception as e:
+                    raise RequestResolverError(
+                        f'Failed to resolve {data} executing {key}({value})'
+                        f'{e.__class__.__name__}: {e}'
+                    )
+        return result
+
+    @classmethod
+    def _resolve_value(cls, data, context):
+        """Resolve a value that is not a dict or list"""
+        if isinstance(data, str) and data.startswith('.'):
             data = data[1:]
             # by default, treat as a literal if this is a string
             as_literal = True
@@ -114,3 +152,142 @@ class RequestResolver:
             # pass through
             return data
 
+    @classmethod
+    def compile(cls, data):
+        """Compile data into a resolver function
+
+        The parts of data that do not depend on context are resolved once
+        and shared between calls; only the placeholders (e.g. .request.user.id)
+        and the expressions that contain them are resolved on each call
+
+        Returns:
+            function that takes context (as kwargs) and returns resolved data,
+            equivalent to calling resolve(data, **context)
+        """
+        constant, value = cls._compile(data)
+        if constant:
+            if isinstance(value, (dict, list)):
+                # callers may change the result, do not share it
+                return lambda **context: copy_constant(value)
+            return lambda **context: value
+        return value
+
+    @classmethod
+    def compile_cached(cls, data):
+        """Get a compiled resolver for data, cached by data content"""
+        try:
+            key = freeze(data)
+            hash(key)
+        except TypeError:
+            # not hashable, cannot be cached
+            return cls.compile(data)
+        return _compile_frozen(key)
+
+    @classmethod
+    def _compile(cls, data):
+        """Compile data
+
+        Returns:
+            tuple of (constant, value):
+                constant: True if data does not depend on context
+                value: the resolved data if constant, otherwise
+                    a function that takes context and returns resolved data
+        """
+        if isinstance(data, dict):
+            items = [
+                (cls._compile(key), cls._compile(value))
+                for key, value in data.items()
+            ]
+            if all(k[0] and v[0] for k, v in items):
+                result = {k[1]: v[1] for k, v in items}
+                if not cls._is_executable(result):
+                    return True, result
+            items = [(k, cls._unshare(v)) for k, v in items]
+
+            def resolve_dict(**context):
+                result = {
+                    k[1] if k[0] else k[1](**context): v[1] if v[0] else v[1](**context)
+                    for k, v in items
+                }
+                if cls._is_executable(result):
+                    key = next(iter(result))
+                    value = unliteral(result[key])
+                    try:
+                        result = execute({key: value}, context)
+                    except Exception as e:
+                        raise RequestResolverError(
+                            f'Failed to resolve {data} executing {key}({value})'
+                            f'{e.__class__.__name__}: {e}'
+                        )
+                return result
+            return False, resolve_dict
+        elif isinstance(data, list):
+            items = [cls._compile(dat) for dat in data]
+            if all(item[0] for item in items):
+                return True, [item[1] for item in items]
+            items = [cls._unshare(item) for item in items]
+
+            def resolve_list(**context):
+                return [
+                    value if constant else value(**context)
+                    for constant, value in items
+                ]
+            return False, resolve_list
+        elif isinstance(data, str) and data.startswith('.'):
+            return False, lambda **context: cls.resolve(data, **context)
+        else:
+            # pass through
+            return True, data
+
+    @classmethod
+    def _unshare(cls, item):
+        """Turn a compiled constant list or dict into a resolver of its copies"""
+        constant, value = item
+        if constant and isinstance(value, (dict, list)):
+            return False, lambda **context: copy_constant(value)
+        return item
+
+    @classmethod
+    def _is_executable(cls, result):
+        """Whether or not a resolved dict is an expression to evaluate"""
+        if len(result) != 1:
+            return False
+        key = next(iter(result))
+        return key in methods and is_literal(result[key])
+
+
+def copy_constant(value):
+    """Copy the dicts and lists of compiled constant data"""
+    if isinstance(value, dict):
+        return {key: copy_constant(val) for key, val in value.items()}
+    if isinstance(value, list):
+        return [copy_constant(val) for val in value]
+    return value
+
+
+def freeze(data):
+    """Get a hashable key for data
+
+    Values are tagged with their type, so that 1, "1" and True
+    or lists and tuples of the same values have different keys
+    """
+    if isinstance(data, dict):
+        return (dict, tuple((freeze(key), freeze(value)) for key, value in data.items()))
+    if type(data) is list or type(data) is tuple:
+        return (type(data), tuple(freeze(value) for value in data))
+    return (type(data), data)
+
+
+def thaw(key):
+    """Get data back from a key made by freeze"""
+    kind, value = key
+    if kind is dict:
+        return {thaw(k): thaw(v) for k, v in value}
+    if kind is list or kind is tuple:
+        return kind(thaw(v) for v in value)
+    return value
+
+
+@lru_cache(maxsize=256)
+def _compile_frozen(key):
+    return RequestResolver.compile(thaw(key))
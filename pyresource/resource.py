@@ -1,3 +1,4 @@
+import logging
 from .expression import execute
 from .utils import as_dict, cached_property
 from .exceptions import FieldError, SchemaResolverError, ResourceMisconfigured, FieldMisconfigured
@@ -6,6 +7,11 @@ from .store import Store
 from .conf import settings
 from .resolver import get_resolver
 
+logger = logging.getLogger(__name__)
+
+# schema class -> name of its primary attribute
+ID_ATTRIBUTES = {}
+
 
 class Resource(object):
     class Schema(ResourceSchema):
@@ -91,15 +97,19 @@ class Resource(object):
         try:
             return self._get_property(key).get_value(resolve=False, id=True)
         except Exception:
-            print(f'Failed to get property {key} on {self}')
+            logger.debug('Failed to get property %s on %s', key, self)
             raise
 
     def has_option(self, key):
         return key in self._options
 
     def get_option(self, key, default=None):
-        if key in self._options:
-            return self._options[key]
+        options = self._options
+        if key in options:
+            return options[key]
+        elif default is None:
+            # nothing to evaluate
+            return None
         else:
             if callable(default):
                 # callable that takes self
@@ -222,12 +232,17 @@ class Resource(object):
         raise FieldError(f"Resource {self.id} has no primary key field")
 
     def get_id_attribute(self):
-        if getattr(self, "_id_attribute", None):
-            return self._id_attribute
+        # the ID attribute is found once per schema,
+        # schemas are shared by all instances of a class
+        schema = self.Schema
+        try:
+            return ID_ATTRIBUTES[schema]
+        except KeyError:
+            pass
 
         for name, field in self.get_attributes().items():
             if isinstance(field, dict) and field.get("primary", False):
-                self._id_attribute = name
+                ID_ATTRIBUTES[schema] = name
                 return name
 
         raise AttributeError(f"Resource {self.id} has no ID attribute")
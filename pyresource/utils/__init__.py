@@ -1,4 +1,7 @@
+import decimal
 import inspect
+import re
+from functools import lru_cache
 from django.template import Template, Context
 from django.utils.functional import cached_property  # noqa
 
@@ -18,8 +21,36 @@ class reversor(object):
         return f'-{repr(self.x)}'
 
 
+def json_default(value):
+    """Get a JSON-compatible representation of a non-native value
+
+    Can be used as the "default" hook of a JSON encoder
+    """
+    # special handling for files (FieldField fields, FieldFile values)
+    # check for and use .url property if it exists
+    try:
+        url = getattr(value, "url", None)
+    except Exception:
+        # there is a url property , but could not resolve it
+        return None
+    else:
+        # there is no url property
+        if url is not None:
+            value = url
+
+    # stringify everything else
+    # e.g. datetime, time, uuid, model instances, etc
+    return str(value)
+
+
+@lru_cache(maxsize=256)
+def get_template(template):
+    """Get a compiled template, parsing each template string once"""
+    return Template(template)
+
+
 def resolve(template, context):
-    template = Template(template)
+    template = get_template(template)
     context = Context(context)
     return template.render(context)
 
@@ -37,19 +68,47 @@ def set_dict(target, template, value):
 
 
 def get(template, context):
-    if not template or not context:
+    """Get a value from a dotted path (or list of parts)
+
+    Each part is read as a key from dicts or an attribute from objects.
+    Returns None if any part is missing
+    """
+    if not template:
         return None
     parts = template.split(".") if isinstance(template, str) else template
+    for part in parts:
+        if not context:
+            return None
+        if isinstance(context, dict):
+            context = context.get(part, None)
+        else:
+            context = getattr(context, part, None)
+    return context
+
+
+def make_getter(template):
+    """Compile a dotted path (or list of parts) into a getter
+
+    The path is split once; getter(context) is equivalent to
+    get(template, context)
+    """
+    if not template:
+        return lambda context: None
+
+    parts = tuple(template.split(".") if isinstance(template, str) else template)
+    if len(parts) > 1:
+        return lambda context: get(parts, context)
+
     part = parts[0]
-    if isinstance(context, dict):
-        next_context = context.get(part, None)
-    else:
-        next_context = getattr(context, part, None)
 
-    if len(parts) == 1:
-        return next_context
-    else:
-        return get(parts[1:], next_context)
+    def getter(context):
+        if not context:
+            return None
+        if isinstance(context, dict):
+            return context.get(part, None)
+        return getattr(context, part, None)
+
+    return getter
 
 
 def as_dict(obj):
@@ -73,6 +132,35 @@ def merge(source, dest):
     return dest
 
 
+def merge_copy(source, dest):
+    """Merge source into a copy of dest
+
+    Same result as merge(source, copy of dest), but only
+    the dicts that change are copied, the rest is shared with dest
+    (dest itself is returned if nothing changes);
+    a dict merged over a non-dict value replaces it
+    """
+    if source is dest:
+        # merging a state into itself changes nothing
+        return dest
+
+    result = None
+    for key, value in source.items():
+        curr = dest.get(key)
+        if isinstance(value, dict):
+            value = merge_copy(value, curr if isinstance(curr, dict) else {})
+        elif isinstance(curr, dict) and isinstance(value, bool):
+            # merge a boolean and dict together as the dict
+            continue
+
+        if value is not curr or key not in dest:
+            if result is None:
+                result = dict(dest)
+            result[key] = value
+
+    return dest if result is None else result
+
+
 def type_add_null(null, other):
     """Naybe add null to a JSONSChema type"""
     if not null:
@@ -90,34 +178,59 @@ def type_add_null(null, other):
         raise ValueError(f"Bad type: {other}")
 
 
+# singleton values of query strings, matched case-insensitively
+SINGLETONS = {"true": True, "false": False, "null": None}
+# common spellings of the singletons, matched without lower()
+SINGLETON_VARIANTS = {
+    variant: value
+    for key, value in SINGLETONS.items()
+    for variant in (key, key.capitalize(), key.upper())
+}
+SINGLETON_INITIALS = frozenset("tTfFnN")
+# numbers accepted by int() and float()
+INT_RE = re.compile(r"\s*[-+]?\d+(_\d+)*\s*$")
+# each digit run can only be matched one way, so that
+# failing matches do not backtrack over long values
+FLOAT_RE = re.compile(
+    r"\s*[-+]?(\d+(_\d+)*(\.(\d+(_\d+)*)?)?|\.\d+(_\d+)*)(e[-+]?\d+(_\d+)*)?\s*$"
+    r"|\s*[-+]?(inf|infinity|nan)\s*$",
+    re.I,
+)
+# first characters of numbers other than digits and whitespace
+NUMBER_INITIALS = frozenset("+-.iInN")
+_missing = object()
+
+
 def coerce_query_value(value, singletons=True):
     """Try to coerce to boolean, null, integer, float"""
-    if singletons:
+    if singletons and 4 <= len(value) <= 5 and value[0] in SINGLETON_INITIALS:
         # coerce to singleton values: boolean/null
-
-        lower = value.lower()
-        if lower == "true":
-            return True
-
-        if lower == "false":
-            return False
-
-        if lower == "null":
-            return None
-
-    try:
-        value = int(value)
-    except ValueError:
-        pass
-    else:
+        coerced = SINGLETON_VARIANTS.get(value, _missing)
+        if coerced is _missing:
+            # mixed case, e.g. "tRue"
+            coerced = SINGLETONS.get(value.lower(), _missing)
+        if coerced is not _missing:
+            return coerced
+
+    # match numbers first: most values are plain strings
+    # and int()/float() would raise for each of them
+    first = value[:1]
+    if not (first in NUMBER_INITIALS or first.isdecimal() or first.isspace()):
+        # cannot be a number, skip the patterns
         return value
 
-    try:
-        value = float(value)
-    except ValueError:
-        pass
-    else:
-        return value
+    if INT_RE.match(value):
+        try:
+            return int(value)
+        except ValueError:
+            # too many digits for int(), e.g. > sys.get_int_max_str_digits()
+            pass
+
+    if FLOAT_RE.match(value):
+        try:
+            return float(value)
+        except ValueError:
+            pass
 
     return value
 
@@ -140,6 +253,10 @@ def unliteral(key):
     return key
 
 
+# quote characters of string literals
+QUOTES = frozenset("\"'")
+
+
 def is_literal(key):
     if isinstance(key, dict):
         # dicts with 1 key are all considered expressions
@@ -147,14 +264,16 @@ def is_literal(key):
         return len(key) > 1
 
     if isinstance(key, list):
-        return all([is_literal(x) for x in key])
+        # stop at the first non-literal
+        return all(is_literal(x) for x in key)
 
     if not isinstance(key, str):
         return True
-    # for strings
-    if key and key.startswith('"') or key.startswith("'") and key[0] == key[-1]:
-        return True
-    return False
+    # for strings: quoted with matching quotes
+    if len(key) < 2:
+        return False
+    first = key[0]
+    return first in QUOTES and key[-1] == first
 
 def make_literal(value):
     if value is None:
@@ -173,6 +292,10 @@ def resource_to_django(key):
     if isinstance(key, (list, tuple)):
         return [resource_to_django(k) for k in key]
 
+    if '.' not in key:
+        # flat key (e.g. "name" or "-name"), nothing to convert
+        return key
+
     desc = False
     if key.startswith('-'):
         desc = True
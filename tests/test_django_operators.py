@@ -0,0 +1,58 @@
+"""Tests on Django filter operators"""
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.db.models import F, Q
+from django.test import SimpleTestCase
+from pyresource.django import operators
+from pyresource.django.operators import make_filter, get_filter, transform_query_key
+from pyresource.exceptions import FilterError
+
+
+class DjangoOperatorsTestCase(SimpleTestCase):
+    def test_comparison(self):
+        self.assertEqual(make_filter({'>': ['age', 1]}), Q(age__gt=1))
+        self.assertEqual(make_filter({'=': ['user.name', '"a"']}), Q(user__name__exact='a'))
+        self.assertEqual(make_filter({'=': ['a', 'b']}), Q(a__exact=F('b')))
+
+    def test_comparison_inverted(self):
+        # literal on the left: arguments are swapped
+        self.assertEqual(make_filter({'>': [1, 'age']}), Q(age__lt=1))
+        self.assertEqual(make_filter({'<=': [1, 'age']}), Q(age__gte=1))
+        self.assertEqual(make_filter({'=': ['"a"', 'name']}), Q(name__exact='a'))
+        with self.assertRaises(FilterError):
+            make_filter({'>': [1, 2]})
+        with self.assertRaises(FilterError):
+            make_filter({'in': [1, 'ids']})
+
+    def test_not(self):
+        self.assertEqual(make_filter({'not': {'=': ['a', 1]}}), ~Q(a__exact=1))
+        self.assertEqual(make_filter({'not': [{'=': ['a', 1]}]}), ~Q(a__exact=1))
+        self.assertEqual(
+            make_filter({'not': {'not': {'=': ['a', 1]}}}),
+            ~~Q(a__exact=1)
+        )
+        with self.assertRaises(FilterError):
+            make_filter({'not': 'a'})
+
+    def test_single_operator(self):
+        with self.assertRaises(FilterError):
+            make_filter({})
+        with self.assertRaises(FilterError):
+            make_filter({'=': ['a', 1], '>': ['b', 2]})
+
+    def test_cache_threads(self):
+        # bounded caches can be filled from many threads at once
+        def build(i):
+            return get_filter({'=': [f'a{i}', i]}), transform_query_key(f'b{i}.c')
+
+        with mock.patch.object(operators, 'BUILD_CACHE_SIZE', 8), \
+                mock.patch.object(operators, 'QUERY_KEY_CACHE_SIZE', 8), \
+                mock.patch.dict(operators._build_cache, clear=True), \
+                mock.patch.dict(operators._query_keys, clear=True):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(build, range(2000)))
+            self.assertLessEqual(len(operators._build_cache), 8)
+            self.assertLessEqual(len(operators._query_keys), 8)
+        for i, (where, key) in enumerate(results):
+            self.assertEqual(where, Q(**{f'a{i}__exact': i}))
+            self.assertEqual(key, f'b{i}__c')
@@ -0,0 +1,36 @@
+"""Tests on Django prefetching"""
+import uuid
+from django.test import TestCase
+from pyresource.django.prefetch import FastQuery, FastPrefetch
+from tests.models import User, Group, Location
+
+
+class FastQueryTestCase(TestCase):
+    def test_get(self):
+        # not using .make, which would shift generated values in other tests
+        location = Location.objects.create(id=uuid.uuid4(), name='a', address='a')
+        group = Group.objects.create(id=uuid.uuid4(), name='a')
+        users = [
+            User.objects.create(
+                id=uuid.uuid4(), first_name=str(i), email=f'{i}@a.com', location=location
+            )
+            for i in range(2)
+        ]
+        for user in users:
+            user.groups.set([group])
+
+        def get_query():
+            return FastQuery(User.objects.all()).only('pk', 'id').prefetch_related(
+                FastPrefetch('groups', queryset=FastQuery(Group.objects.only('pk', 'id')))
+            )
+
+        with self.assertNumQueries(3):
+            # one query for users, two for groups (joins, then records)
+            user = get_query().get(pk=users[0].pk)
+        self.assertEqual(user.pk, users[0].pk)
+        self.assertEqual([g['id'] for g in user['groups']], [group.id])
+
+        with self.assertRaises(User.MultipleObjectsReturned):
+            get_query().get()
+        with self.assertRaises(User.DoesNotExist):
+            get_query().get(first_name='missing')
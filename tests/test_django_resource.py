@@ -1,8 +1,11 @@
 """Tests on Django engine"""
 import base64
 import json
+from unittest import mock
 from urllib.parse import quote
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from pyresource import __version__
 from pyresource.space import Space
 from pyresource.resource import Resource
@@ -16,6 +19,8 @@ from pyresource.schemas import (
     TypeSchema
 )
 from pyresource.conf import settings
+from pyresource.executor import Executor
+from pyresource.query import Query
 from tests.models import User, Group, Location
 from .server import get_server
 from .utils import Request, Fixture
@@ -483,6 +488,151 @@ class DjangoIntegrationTestCase(TestCase):
         self.assertEqual(get_where_related, {"data": []})
 
 
+    def test_get_resource_prefetch(self):
+        """Tests that deep relations are fetched in batches, not per record"""
+        server = get_server()
+        tests = server.spaces_by_name["tests"]
+        users = tests.resources_by_name["users"]
+
+        fixture = get_fixture()
+        userA = fixture.users[0]
+        request = Request(userA)
+        groupA, groupB, _ = fixture.groups
+        query = users.query("?take=id&take.groups=id,users")
+
+        few = {}
+        query.get(request=request, queries=few)
+        for i in range(3):
+            user = User.make(family_name=f"P{i}", first_name="Prefetch")
+            user.groups.set([groupA, groupB])
+
+        many = {}
+        result = query.get(request=request, queries=many)
+        self.assertEqual(len(result["data"]), 5)
+        self.assertEqual(len(few["queries"]), len(many["queries"]))
+
+    def test_get_resource_selection(self):
+        """Tests that fields are selected once per level, not per record"""
+        server = get_server()
+        tests = server.spaces_by_name["tests"]
+        users = tests.resources_by_name["users"]
+
+        fixture = get_fixture()
+        request = Request(fixture.users[0])
+        groupA, groupB, _ = fixture.groups
+        for i in range(3):
+            user = User.make(family_name=f"S{i}", first_name="Select")
+            user.groups.set([groupA, groupB])
+
+        select_fields = Executor._select_fields.__func__
+        levels = []
+
+        def count_select_fields(cls, *args, **kwargs):
+            levels.append(kwargs.get("level"))
+            return select_fields(cls, *args, **kwargs)
+
+        query = users.query("?take=id&take.groups=id,name")
+        with mock.patch.object(Executor, "_select_fields", classmethod(count_select_fields)):
+            result = query.get(request=request)
+        self.assertEqual(len(result["data"]), 5)
+        self.assertEqual(sorted(levels, key=str), [None, "groups"])
+
+    def test_get_resource_prefetch_page(self):
+        """Tests that deep relations are limited per record"""
+        server = get_server()
+        tests = server.spaces_by_name["tests"]
+        users = tests.resources_by_name["users"]
+
+        fixture = get_fixture()
+        userA = fixture.users[0]
+        request = Request(userA)
+        groupA, groupB, _ = fixture.groups
+        for i in range(3):
+            user = User.make(family_name=f"P{i}", first_name="Prefetch")
+            user.groups.set([groupA, groupB])
+
+        # the root page is larger than the related pages:
+        # each level is cut to its own size
+        query = users.query(
+            "?take=id&take.groups=id&sort=id&page:size=4&page.groups:size=1"
+        )
+        page_1 = query.get(request=request)
+        self.assertEqual(len(page_1["data"]), 4)
+        for user in page_1["data"]:
+            self.assertEqual(len(user["groups"]), 1)
+
+        after = Query.decode_state(page_1["meta"]["page"]["data"]["after"])
+        page_2 = query.page(after=after["page"]["after"]).get(request=request)
+        self.assertEqual(len(page_2["data"]), 1)
+        self.assertEqual(len(page_2["data"][0]["groups"]), 1)
+        self.assertNotIn("page", page_2.get("meta", {}))
+        self.assertEqual(
+            len({user["id"] for user in page_1["data"] + page_2["data"]}), 5
+        )
+
+    def test_take_fields_cache(self):
+        server = get_server()
+        tests = server.spaces_by_name["tests"]
+        users = tests.resources_by_name["users"]
+
+        fixture = get_fixture()
+        request = Request(fixture.users[0])
+        query = Query(state={"resource": "users", "take": {"id": True}})
+        take_fields = Executor._take_fields
+
+        def names(request):
+            fields = take_fields(users, "get", query=query, request=request)
+            return [field.name for field in fields]
+
+        self.assertEqual(names(request), ["id"])
+        self.assertEqual(names(None), ["id"])
+        # in-place changes clear the selections of every request
+        query._update({"take": {"name": True}}, merge=True, copy=False)
+        self.assertEqual(names(request), ["id", "name"])
+        self.assertEqual(names(None), ["id", "name"])
+
+    def test_serialize_related_manager(self):
+        server = get_server()
+        tests = server.spaces_by_name["tests"]
+        users = tests.resources_by_name["users"]
+
+        fixture = get_fixture()
+        userA = fixture.users[0]
+        request = Request(userA)
+        query = users.query("?take=id&take.groups=id&page.groups:size=1")
+        fields = Executor._take_fields(users, action="get", query=query, request=request)
+
+        # related managers are read with a LIMIT of one more than the page
+        records = list(User.objects.filter(groups__isnull=False).distinct().order_by("id"))
+        with CaptureQueriesContext(connection) as capture:
+            data = Executor._serialize(
+                users, fields, record=records, query=query, request=request
+            )
+        for user in data:
+            self.assertEqual(len(user["groups"]), 1)
+        group_queries = [
+            q["sql"] for q in capture.captured_queries if "tests_group" in q["sql"]
+        ]
+        self.assertTrue(group_queries)
+        for sql in group_queries:
+            self.assertIn("LIMIT 2", sql)
+
+        # prefetched relations are sliced without another query
+        records = list(
+            User.objects.filter(groups__isnull=False)
+            .distinct()
+            .order_by("id")
+            .prefetch_related("groups")
+        )
+        with self.assertNumQueries(0):
+            prefetched = Executor._serialize(
+                users, fields, record=records, query=query, request=request
+            )
+        self.assertEqual(
+            [(user["id"], len(user["groups"])) for user in prefetched],
+            [(user["id"], 1) for user in data]
+        )
+
     def test_get_resource(self):
         """Tests get_resource"""
         server = get_server()
@@ -706,7 +856,12 @@ class DjangoIntegrationTestCase(TestCase):
         page_1 = page_1_query.execute(request=request)
 
         # after is a b64-encoded query, which contains a b64-encoded pagination token
-        after = base64.b64encode(json.dumps({"offset": 1}).encode("utf-8")).decode()
+        # users are sorted by "created": the token has the last user's keyset
+        created = User.objects.get(pk=userA.id).created
+        # the token also has the position of the next page
+        after = {"after": {"created": str(created), "pk": str(userA.id)}, "offset": 1}
+        after = json.dumps(after, separators=(",", ":")).encode("utf-8")
+        after = base64.urlsafe_b64encode(after).decode()
         after = page_1_query.page(after=after).encode()
 
         self.assertEqual(
@@ -721,6 +876,32 @@ class DjangoIntegrationTestCase(TestCase):
         page_2 = server.query(f'?query={quote(after)}').execute(request=request)
         self.assertEqual(page_2, {"data": [{"id": str(userB.id)}]})
 
+        # offset tokens are still supported
+        after = json.dumps({"offset": 1}).encode("utf-8")
+        after = base64.b64encode(after).decode()
+        page_2 = page_1_query.page(after=after).execute(request=request)
+        self.assertEqual(page_2, {"data": [{"id": str(userB.id)}]})
+
+        # nullable sort columns use offset tokens: keysets would skip nulls
+        User.objects.filter(pk=userB.id).update(family_name=None)
+        page_1_query = users.query.take("id").sort("last_name").page(size=1).action('get')
+        page_1 = page_1_query.execute(request=request)
+        after = Query.decode_state(page_1["meta"]["page"]["data"]["after"])
+        self.assertEqual(Executor._decode_cursor(after["page"]["after"]), {"offset": 1})
+        page_2 = page_1_query.page(after=after["page"]["after"]).execute(request=request)
+        self.assertEqual(
+            {page_1["data"][0]["id"], page_2["data"][0]["id"]},
+            {str(userA.id), str(userB.id)}
+        )
+
+        # offset fallbacks after a keyset page continue from its position
+        cursor = Executor._encode_cursor({"after": {"x": 1}, "offset": 5})
+        next_page = Executor._get_next_page(
+            Query(state={"resource": "users", "page": {"size": 1, "after": cursor}})
+        )
+        next_page = Query.decode_state(next_page)
+        self.assertEqual(Executor._decode_cursor(next_page["page"]["after"]), {"offset": 6})
+
         # aggregating
         user_stats_query = users.query.group({
             "count": {'count': 'id'},
@@ -0,0 +1,64 @@
+"""Tests on Django responses"""
+import dataclasses
+import datetime
+import json
+import unittest
+import uuid
+from django.test import SimpleTestCase
+from pyresource.django import response
+from pyresource.django.response import JSONResponse
+
+
+class File:
+    url = '/media/a.txt'
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+
+
+class JSONResponseTestCase(SimpleTestCase):
+    def test_json_response(self):
+        date = datetime.date(2020, 1, 2)
+        data = {'data': [{'id': 1, 'name': 'a', 'date': date, 'file': File()}]}
+        expected = {'data': [{'id': 1, 'name': 'a', 'date': '2020-01-02', 'file': '/media/a.txt'}]}
+        for orjson in (response.orjson, None):
+            with self.subTest(orjson=orjson is not None):
+                original = response.orjson
+                response.orjson = orjson
+                try:
+                    result = JSONResponse(data, status=201)
+                finally:
+                    response.orjson = original
+                self.assertEqual(result.status_code, 201)
+                self.assertEqual(result['Content-Type'], 'application/json')
+                self.assertEqual(json.loads(result.content), expected)
+
+        self.assertEqual(json.loads(JSONResponse([1], safe=False).content), [1])
+        with self.assertRaises(TypeError):
+            JSONResponse([1])
+
+    @unittest.skipIf(response.orjson is None, 'orjson is not installed')
+    def test_json_response_encoders(self):
+        # both encoders give the same content for the same data
+        data = {
+            'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2020, 1, 2),
+            'time': datetime.time(1, 2),
+            'uuid': uuid.UUID(int=5),
+            'point': Point(1),
+            'file': File(),
+            1: [1.5, True, None],
+            None: {2: 'a'},
+        }
+        contents = []
+        for orjson in (response.orjson, None):
+            original = response.orjson
+            response.orjson = orjson
+            try:
+                contents.append(JSONResponse(data).content)
+            finally:
+                response.orjson = original
+        self.assertEqual(contents[0], contents[1])
+        self.assertEqual(json.loads(contents[0])['datetime'], '2020-01-02 03:04:05.000006+00:00')
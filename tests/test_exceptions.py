@@ -0,0 +1,14 @@
+"""Tests on exceptions"""
+from django.test import SimpleTestCase
+from pyresource.exceptions import RequestError, NotFound, RequestTimeout, Conflict
+
+
+class ExceptionsTestCase(SimpleTestCase):
+    def test_request_error_code(self):
+        self.assertEqual(RequestError('error').code, 500)
+        self.assertEqual(RequestError('limit', code=429).code, 429)
+        self.assertEqual(NotFound('missing').code, 404)
+        self.assertEqual(NotFound('gone', code=410).code, 410)
+        self.assertEqual(RequestTimeout().code, 408)
+        self.assertEqual(Conflict().code, 409)
+        self.assertEqual(str(NotFound('missing')), 'missing')
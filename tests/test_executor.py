@@ -0,0 +1,157 @@
+"""Tests on executor helpers"""
+import base64
+import json
+import datetime
+import uuid
+from django.test import SimpleTestCase
+from pyresource.exceptions import SerializationError
+from pyresource.executor import Executor
+from pyresource.query import Query
+from pyresource.record import Record
+
+
+class File:
+    url = '/media/a.txt'
+
+
+class MissingFile:
+    @property
+    def url(self):
+        raise ValueError('no file')
+
+
+class User:
+    id = 7
+
+
+class Request:
+    user = User()
+
+
+class ExecutorTestCase(SimpleTestCase):
+    def test_to_json_value(self):
+        to_json = Executor._to_json_value
+        date = datetime.date(2020, 1, 2)
+        self.assertEqual(to_json(1), 1)
+        self.assertEqual(to_json(None), None)
+        self.assertEqual(to_json([1, 'a', date]), [1, 'a', '2020-01-02'])
+        self.assertEqual(to_json((1, (2, ))), [1, [2]])
+        self.assertEqual(to_json({'a': date, 1: [date]}), {'a': '2020-01-02', 1: ['2020-01-02']})
+        self.assertEqual(to_json(File()), '/media/a.txt')
+        self.assertEqual(to_json(MissingFile()), None)
+        nested = [1]
+        for _ in range(2000):
+            nested = [{'a': nested, 'b': date}]
+        result = to_json(nested)
+        for _ in range(2000):
+            self.assertEqual(result[0]['b'], '2020-01-02')
+            result = result[0]['a']
+        self.assertEqual(result, [1])
+        # shared values are converted, circular references raise
+        shared = [date]
+        self.assertEqual(to_json([shared, {'a': shared}]), [['2020-01-02'], {'a': ['2020-01-02']}])
+        cycle = [date]
+        cycle.append({'a': cycle})
+        with self.assertRaises(SerializationError):
+            to_json(cycle)
+
+    def test_serialize_value(self):
+        serialize = Executor._serialize_value
+        pk = uuid.uuid4()
+        self.assertEqual(serialize(Record(pk=1)), 1)
+        self.assertEqual(serialize(Record(pk=pk)), str(pk))
+        self.assertEqual(serialize([Record(pk=1), Record(pk=pk), 2]), [1, str(pk), 2])
+        self.assertEqual(serialize(None), None)
+
+    def test_serialize_sources(self):
+        fields = [
+            Record(name='id', type='string', source='id'),
+            Record(name='user', type='number', source='.request.user.id'),
+            Record(name='location', type='string', source='location.name'),
+        ]
+        records = [
+            {'.id': 1, 'location': {'name': 'a'}},
+            {'.id': 2, '.location': 'b'},
+        ]
+        self.assertEqual(
+            Executor._serialize(
+                Record(id='users'),
+                fields,
+                record=records,
+                query=Query(state={}),
+                request=Request(),
+                field_prefix='.'
+            ),
+            [
+                {'id': 1, 'user': 7, 'location': 'a'},
+                {'id': 2, 'user': 7, 'location': 'b'}
+            ]
+        )
+
+    def test_get_query_state(self):
+        get_state = Executor._get_query_state
+        query = Query(state={
+            'resource': 'users',
+            'field': 'groups',
+            'take': {'id': True},
+            'page': {'size': 1},
+        })
+        state = get_state(query)
+        self.assertEqual(state, {'resource': 'users', 'field': 'groups'})
+        # states are shared until the query changes
+        self.assertIs(get_state(query), state)
+        self.assertIsNot(get_state(query, copy=True), state)
+        query._update({'action': 'get'}, copy=False)
+        self.assertIsNot(get_state(query), state)
+        self.assertEqual(get_state(query)['action'], 'get')
+
+        # queries built from a querystring do not change their source
+        source = Query(state={'resource': 'users', 'page': {'size': 1}})
+        state = get_state(source)
+        derived = source('?page:size=5&take.groups=id&sort=-id')
+        self.assertEqual(get_state(derived)['page'], {'size': 5})
+        self.assertEqual(get_state(derived)['sort'], ['-id'])
+        self.assertEqual(source.state, {'resource': 'users', 'page': {'size': 1}})
+        self.assertIs(get_state(source), state)
+        self.assertEqual(state, {'resource': 'users', 'page': {'size': 1}})
+
+    def test_can_take_field(self):
+        class Field:
+            _can_cache = None
+            can = {'get': True, 'set': {'true': '.request.user.id'}}
+            depends = None
+
+        field = Field()
+        query = Query(state={})
+        request = Request()
+        can_take = Executor._can_take_field
+        self.assertTrue(can_take(field, 'get', query=query, request=request))
+        self.assertFalse(can_take(field, 'add', query=query, request=request))
+        self.assertTrue(can_take(field, 'set', query=query, request=request))
+        # static results are cached, expressions are not
+        self.assertEqual(field._can_cache[2], {'get': True, 'add': False})
+        self.assertTrue(can_take(field, 'get', query=query, request=request))
+
+    def test_cursor(self):
+        cursor = {'offset': 10, 'after': {'name': '??>'}}
+        encoded = Executor._encode_cursor(cursor)
+        self.assertNotIn('+', encoded)
+        self.assertNotIn('/', encoded)
+        self.assertEqual(Executor._decode_cursor(encoded), cursor)
+        # standard base64 cursors are still accepted
+        standard = base64.b64encode(json.dumps(cursor).encode()).decode()
+        self.assertIn('/', standard)
+        self.assertEqual(Executor._decode_cursor(standard), cursor)
+
+    def test_get_next_page(self):
+        state = {'resource': 'users', 'take': {'id': True}, 'page': {'size': 2}}
+        query = Query(state=state)
+        next_page = Executor._get_next_page(query)
+        next_state = Query.decode_state(next_page)
+        self.assertEqual(next_state['page']['size'], 2)
+        self.assertEqual(
+            Executor._decode_cursor(next_state['page']['after']), {'offset': 2}
+        )
+        # the query's state is not changed
+        self.assertEqual(state['page'], {'size': 2})
+        self.assertIs(Executor._get_query_state(query), state)
@@ -0,0 +1,35 @@
+"""Tests on expressions"""
+from django.test import SimpleTestCase
+from pyresource.expression import execute, compile_expression
+
+
+class ExpressionTestCase(SimpleTestCase):
+    def test_execute_and_compile(self):
+        context = {
+            'fields': {'a': 1, 'b': None, 'name': 'x'},
+            'request': {'user': {'id': 3}}
+        }
+        cases = [
+            ('a', 1),
+            ('.request.user.id', 3),
+            ('"a"', 'a'),
+            ({'null': 'b'}, True),
+            ({'not.null': 'b'}, False),
+            ({'null': ['a']}, False),
+            ({'true': 'a'}, True),
+            ({'false': 'b'}, True),
+            ({'<=': ['a', 1]}, True),
+            ({'>=': ['a', 2]}, False),
+            ({'!=': ['a', 1]}, False),
+            ({'in': ['a', [1, 2]]}, True),
+            ({'or': [{'null': 'a'}, {'=': ['a', 1]}]}, True),
+            ({'and': [{'null': 'b'}, {'>': ['a', 1]}]}, False),
+            ({'join': ['name', '"y"']}, 'xy'),
+        ]
+        for expression, expected in cases:
+            with self.subTest(expression=expression):
+                self.assertEqual(execute(expression, context), expected)
+                self.assertEqual(compile_expression(expression)(context), expected)
+
+        with self.assertRaises(ValueError):
+            compile_expression({'unknown': 'a'})
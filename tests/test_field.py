@@ -0,0 +1,37 @@
+"""Tests on fields"""
+from django.test import SimpleTestCase
+from pyresource.field import Field, LinkField, LinkListField, ListField, ValueField
+
+
+class FieldTestCase(SimpleTestCase):
+    def test_make(self):
+        field = Field.make(id='a.b', name='b', type='string')
+        self.assertIsInstance(field, ValueField)
+        self.assertFalse(field._has_inverse)
+        field = Field.make(id='a.b', name='b', type={'type': 'array', 'items': 'string'})
+        self.assertIsInstance(field, ListField)
+        field = Field.make(id='a.b', name='b', type='@users', inverse='b')
+        self.assertIsInstance(field, LinkField)
+        self.assertNotIsInstance(field, LinkListField)
+        self.assertEqual(field._is_link, 'users')
+        self.assertTrue(field._has_inverse)
+        field = Field.make(
+            id='a.b', name='b', type={'type': 'array', 'items': '@users'}
+        )
+        self.assertIsInstance(field, LinkListField)
+        self.assertTrue(field._is_list)
+        # fields without a type are not specialized
+        self.assertIs(type(Field.make(id='a.b', name='b')), Field)
+
+    def test_values(self):
+        field = Field.make(id='a.b', name='b', type={'type': 'array', 'items': 'string'})
+        field.set_value(['a'])
+        field.add_value('b')
+        field.add_value(['c', 'd'])
+        self.assertEqual(field.get_value(), ['a', 'b', 'c', 'd'])
+
+        field = Field.make(id='a.b', name='b', type='string')
+        field.set_value('a')
+        self.assertEqual(field.get_value(), 'a')
+        with self.assertRaises(NotImplementedError):
+            field.add_value('b')
@@ -0,0 +1,129 @@
+"""Tests on queries"""
+from django.test import SimpleTestCase
+from pyresource.exceptions import QueryValidationError
+from pyresource.query import Query, clone_state, iter_querystring
+
+
+class QueryTestCase(SimpleTestCase):
+    def test_clone_state(self):
+        state = {'take': {'a': True, 'b': {'take': {'c': True}}}, 'sort': ['a']}
+        clone = clone_state(state)
+        self.assertEqual(clone, state)
+        self.assertIsNot(clone['take']['b'], state['take']['b'])
+        self.assertIsNot(clone['sort'], state['sort'])
+
+    def test_update(self):
+        state = {
+            'resource': 'users',
+            'take': {'id': True, 'groups': {'take': {'id': True}}, 'location': {'take': {'id': True}}}
+        }
+        query = Query(state=state)
+        updated = query.take.groups('name').page.groups(size=5)
+        self.assertEqual(
+            updated.state['take']['groups'],
+            {'take': {'id': True, 'name': True}, 'page': {'size': 5}}
+        )
+        # the original query is unchanged
+        self.assertEqual(state['take']['groups'], {'take': {'id': True}})
+        # untouched branches are shared
+        self.assertIs(updated.state['take']['location'], state['take']['location'])
+
+        # boolean levels become dicts
+        updated = query.take.location.city('name')
+        self.assertEqual(
+            updated.state['take']['location']['take']['city'],
+            {'take': {'name': True}}
+        )
+        self.assertEqual(state['take']['location'], {'take': {'id': True}})
+
+        # clones do not share anything
+        clone = query.clone()
+        self.assertEqual(clone.state, state)
+        self.assertIsNot(clone.state['take']['location'], state['take']['location'])
+
+    def test_from_querystring(self):
+        querystring = 'users?take=id,name&take.groups=id&page:size=5&where:name=a'
+        first = Query.from_querystring(querystring, state={'space': 'tests'})
+        expected = {
+            'space': 'tests',
+            'resource': 'users',
+            'take': {'id': True, 'name': True, 'groups': {'take': {'id': True}}},
+            'page': {'size': 5},
+            'where': {'=': ['name', 'a']}
+        }
+        self.assertEqual(first.state, expected)
+        # parsed querystrings are cached, but not shared between queries
+        first.state['take']['groups']['take']['name'] = True
+        first.state['where']['='][1] = 'b'
+        second = Query.from_querystring(querystring, state={'space': 'tests'})
+        self.assertEqual(second.state, expected)
+        self.assertGreaterEqual(Query._parse_querystring.cache_info().hits, 1)
+
+    def test_build_update(self):
+        self.assertEqual(Query._build_update([], None, {'a': 1}), {'a': 1})
+        self.assertEqual(Query._build_update([], 'take', {'a': True}), {'take': {'a': True}})
+        self.assertEqual(Query._build_update(['size'], 'page', 5), {'page': {'size': 5}})
+        self.assertEqual(
+            Query._build_update(['a', 'b', 'c'], 'parameters', 1),
+            {'parameters': {'a': {'b': {'c': 1}}}}
+        )
+
+    def test_build_updates_batched(self):
+        updates = [
+            ({'resource': 'users'}, None, False),
+            ({'page': {'size': 5}}, None, True),
+            ({'page': {'cursor': 'x'}}, None, True),
+            ({'take': {'id': True}}, 'groups', True),
+            ({'sort': ['id']}, None, False),
+            ({'take': {'name': True}}, 'groups', True),
+            ({'take': {'name': True}}, 'groups', True),
+        ]
+        self.assertEqual(Query._build_updates_batched(updates), [
+            ({'resource': 'users'}, None, False),
+            ({'page': {'size': 5, 'cursor': 'x'}}, None, True),
+            ({'take': {'id': True}}, 'groups', True),
+            ({'sort': ['id']}, None, False),
+            ({'take': {'name': True}}, 'groups', True),
+        ])
+
+    def test_from_querystring_where(self):
+        state = {'space': 'tests'}
+        query = Query.from_querystring('users?where:name=a&where:id:gt=1', state=state)
+        self.assertEqual(
+            query.state['where'],
+            {'and': [{'=': ['name', 'a']}, {'gt': ['id', 1]}]}
+        )
+        query = Query.from_querystring(
+            'users?where:name:equals:x=a&where:id:gt:y=1&where=x or y', state=state
+        )
+        self.assertEqual(
+            query.state['where'],
+            {'or': [{'equals': ['name', 'a']}, {'gt': ['id', 1]}]}
+        )
+        with self.assertRaises(QueryValidationError):
+            Query.from_querystring('users?where.groups:a:b:c:d=a', state=state)
+        with self.assertRaises(QueryValidationError):
+            Query.from_querystring('users?where:name:equals:and=a', state=state)
+
+    def test_parse_key(self):
+        self.assertEqual(Query._parse_key('take'), ('take', None, ()))
+        self.assertEqual(Query._parse_key('page.users:size'), ('page', 'users', ('size', )))
+        self.assertEqual(
+            Query._parse_key('where.users.groups:name:equals'),
+            ('where', 'users.groups', ('name', 'equals'))
+        )
+        self.assertEqual(Query._parse_key('parameters.a'), ('parameters', None, ('a', )))
+        self.assertEqual(Query._parse_key('foo'), (None, None, ('foo', )))
+
+    def test_iter_querystring(self):
+        self.assertEqual(
+            list(iter_querystring('take=id,name&where:name=Joe%20B&where=a+and+b&a=&b')),
+            [('take', 'id,name'), ('where:name', 'Joe B'), ('where', 'a and b')]
+        )
+
+    def test_from_querystring_merge(self):
+        # a dict merged over a value replaces it, as in _update
+        query = Query.from_querystring('users?page:a=1&page:a:b=2', state={'space': 'tests'})
+        self.assertEqual(query.state['page'], {'a': {'b': 2}})
+        query = Query.from_querystring('users?page:a:b=2&page:a=1', state={'space': 'tests'})
+        self.assertEqual(query.state['page'], {'a': 1})
@@ -0,0 +1,66 @@
+"""Tests on resolvers"""
+from django.test import SimpleTestCase
+from pyresource.resolver import RequestResolver
+
+
+class User:
+    id = 7
+    name = 'joe'
+
+
+class Request:
+    user = User()
+
+
+class RequestResolverTestCase(SimpleTestCase):
+    def test_resolve(self):
+        request = Request()
+        resolve = RequestResolver.resolve
+        self.assertEqual(resolve('.request.user.id', request=request), 7)
+        self.assertEqual(resolve('.request.user.name', request=request), '"joe"')
+        self.assertEqual(resolve('.request.user.name.', request=request), 'joe')
+        self.assertEqual(resolve('name', request=request), 'name')
+        data = {
+            'and': [
+                {'=': ['id', '.request.user.id']},
+                {'in': ['name', ['.request.user.name', {'a': '.request.user.id'}]]},
+            ]
+        }
+        self.assertEqual(resolve(data, request=request), {
+            'and': [
+                {'=': ['id', 7]},
+                {'in': ['name', ['"joe"', {'a': 7}]]},
+            ]
+        })
+        # expressions of constants are evaluated
+        self.assertIs(resolve({'=': ['.request.user.id', 7]}, request=request), True)
+        self.assertIs(
+            RequestResolver.compile({'=': ['.request.user.id', 7]})(request=request),
+            True
+        )
+        # the data is not changed
+        self.assertEqual(data['and'][0], {'=': ['id', '.request.user.id']})
+
+    def test_compile_cached(self):
+        request = Request()
+        compile_cached = RequestResolver.compile_cached
+        data = {'and': [{'=': ['id', '.request.user.id']}, {'in': ['a', [1, 2]]}]}
+        self.assertIs(compile_cached(data), compile_cached(dict(data)))
+        # constant results are copies, changing them does not change the cache
+        result = compile_cached(data)(request=request)
+        self.assertEqual(result, {'and': [{'=': ['id', 7]}, {'in': ['a', [1, 2]]}]})
+        result['and'][1]['in'][1].append(3)
+        self.assertEqual(
+            compile_cached(data)(request=request)['and'][1], {'in': ['a', [1, 2]]}
+        )
+        constant = {'in': ['a', [1, 2]]}
+        compile_cached(constant)()['in'].append('b')
+        self.assertEqual(compile_cached(constant)(), {'in': ['a', [1, 2]]})
+        # keys and values of different types are cached apart
+        self.assertEqual(compile_cached({1: 'a'})(), {1: 'a'})
+        self.assertEqual(compile_cached({'1': 'a'})(), {'1': 'a'})
+        self.assertEqual(compile_cached([(1, 2)])(), [(1, 2)])
+        self.assertEqual(compile_cached([[1, 2]])(), [[1, 2]])
+        self.assertIs(compile_cached({'a': True})()['a'], True)
+        self.assertIs(compile_cached({'a': 1})()['a'], 1)
+        self.assertIs(compile_cached({'a': True})()['a'], True)
@@ -0,0 +1,122 @@
+"""Tests on utilities"""
+import time
+from django.test import SimpleTestCase
+from pyresource.utils import (
+    coerce_query_value,
+    get,
+    get_template,
+    is_literal,
+    make_getter,
+    merge,
+    merge_copy,
+    resolve,
+    resource_to_django,
+)
+
+
+class UtilsTestCase(SimpleTestCase):
+    def test_is_literal(self):
+        # quoted strings
+        self.assertTrue(is_literal('"foo"'))
+        self.assertTrue(is_literal("'foo'"))
+        self.assertTrue(is_literal("'foo'bar'"))
+        self.assertTrue(is_literal('""'))
+        # field references and unterminated quotes
+        self.assertFalse(is_literal('foo'))
+        self.assertFalse(is_literal('"foo'))
+        self.assertFalse(is_literal('"foo\''))
+        self.assertFalse(is_literal('"'))
+        self.assertFalse(is_literal(''))
+        # non-strings
+        self.assertTrue(is_literal(1))
+        self.assertTrue(is_literal(None))
+        self.assertTrue(is_literal(['"a"', 2]))
+        self.assertFalse(is_literal(['"a"', 'b']))
+        self.assertFalse(is_literal({'true': 'a'}))
+
+    def test_resource_to_django(self):
+        self.assertEqual(resource_to_django('name'), 'name')
+        self.assertEqual(resource_to_django('-name'), '-name')
+        self.assertEqual(resource_to_django('user.name'), 'user__name')
+        self.assertEqual(resource_to_django('-user.name'), '-user__name')
+        self.assertEqual(resource_to_django('.name'), '.name')
+        self.assertEqual(resource_to_django(['a.b', 'c']), ['a__b', 'c'])
+
+    def test_get(self):
+        class User:
+            id = 1
+            groups = {'a': 0}
+
+        context = {'user': User(), 'empty': {}}
+        self.assertEqual(get('user.id', context), 1)
+        self.assertEqual(get(['user', 'groups', 'a'], context), 0)
+        self.assertEqual(get('user.name', context), None)
+        self.assertEqual(get('empty.a.b', context), None)
+        self.assertEqual(get('', context), None)
+        self.assertEqual(get('a', None), None)
+
+    def test_make_getter(self):
+        class User:
+            id = 1
+
+        context = {'user': User(), 'name': 'a'}
+        self.assertEqual(make_getter('name')(context), 'a')
+        self.assertEqual(make_getter('user.id')(context), 1)
+        self.assertEqual(make_getter(['user', 'id'])(context), 1)
+        self.assertEqual(make_getter('id')(User()), 1)
+        self.assertEqual(make_getter('missing')(context), None)
+        self.assertEqual(make_getter('name')(None), None)
+        self.assertEqual(make_getter('')(context), None)
+
+    def test_resolve(self):
+        template = '{{ user.id }}-{{ name }}'
+        self.assertEqual(resolve(template, {'user': {'id': 1}, 'name': 'a'}), '1-a')
+        self.assertEqual(resolve(template, {'user': {'id': 2}, 'name': 'b'}), '2-b')
+        # templates are parsed once
+        self.assertIs(get_template(template), get_template(template))
+
+    def test_coerce_query_value(self):
+        self.assertIs(coerce_query_value('true'), True)
+        self.assertIs(coerce_query_value('False'), False)
+        self.assertIs(coerce_query_value('NULL'), None)
+        self.assertIs(coerce_query_value('nUlL'), None)
+        self.assertEqual(coerce_query_value('true', singletons=False), 'true')
+        self.assertEqual(coerce_query_value('-12'), -12)
+        self.assertEqual(coerce_query_value('1_000'), 1000)
+        self.assertEqual(coerce_query_value('1.5'), 1.5)
+        self.assertEqual(coerce_query_value('.5e2'), 50.0)
+        self.assertEqual(coerce_query_value('1.2.3'), '1.2.3')
+        self.assertEqual(coerce_query_value('e5'), 'e5')
+        self.assertEqual(coerce_query_value('name'), 'name')
+        self.assertEqual(coerce_query_value(''), '')
+        self.assertEqual(coerce_query_value('5.'), 5.0)
+        self.assertEqual(coerce_query_value('1_0.5e1_0'), 1_0.5e1_0)
+        # more digits than int() accepts: float, as with try/except
+        self.assertEqual(coerce_query_value('9' * 5000), float('inf'))
+
+    def test_coerce_query_value_long(self):
+        # long non-numeric values are rejected without backtracking
+        values = ['1' * 32000 + 'x', '1' * 16000 + '.' + '1' * 16000 + 'x']
+        start = time.perf_counter()
+        for value in values:
+            self.assertEqual(coerce_query_value(value), value)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_merge_copy(self):
+        def make_dest():
+            return {'a': {'b': {'y': 2}, 'c': {'d': 1}}, 'e': {'f': 2}, 'g': 1}
+
+        source = {'a': {'b': {'x': 1}, 'c': True}, 'g': 2, 'h': {'i': 3}}
+        dest = make_dest()
+        merged = merge_copy(source, dest)
+        self.assertEqual(merged, merge(source, make_dest()))
+        self.assertEqual(merged['a'], {'b': {'x': 1, 'y': 2}, 'c': {'d': 1}})
+        # dest is unchanged, unchanged branches are shared
+        self.assertEqual(dest, make_dest())
+        self.assertIs(merged['e'], dest['e'])
+        self.assertIsNot(merged['h'], source['h'])
+        # dicts replace other values
+        self.assertEqual(merge_copy({'a': {'b': 1}}, {'a': True}), {'a': {'b': 1}})
+        # nothing changes: nothing is copied
+        self.assertIs(merge_copy({'a': {'c': {'d': 1}}}, dest), dest)
+        self.assertIs(merge_copy(dest, dest), dest)